@@ -0,0 +1,5 @@
+from flask import Flask
+
+# flask application shared by all pages, server.py and asgi.py only import pages and start it
+# it has its own module so worker processes which import server.py again get the same app as pages
+app = Flask(__name__)
@@ -0,0 +1,11 @@
+import server
+from scripts.utils import read_config
+from scripts.utils import asgi_adapter
+
+# production entry point, flask app runs under asgi server with computations in executors
+# example: uvicorn asgi:application --host 0.0.0.0 --port 5000
+config = read_config.read_config()
+application = asgi_adapter.asgi_adapter(server.app,
+                                        light_workers=config["light_workers"],
+                                        heavy_workers=config["heavy_workers"],
+                                        stream_workers=config["stream_workers"])
@@ -0,0 +1,93 @@
+from app import app
+from flask import Flask, request, jsonify, Response
+import datetime
+
+from scripts.satellite import registry
+from scripts.satellite import observer
+from scripts.satellite import snapshot
+from scripts.satellite import pass_pool
+from scripts.satellite import vector_data
+from scripts.satellite import live_stream
+
+# vector data of maps and radar, browser draws them itself so nothing is rendered on server
+
+
+# returns number from query string
+# input: (name of argument, value when argument is missing, type of value)
+# output: value
+def read_argument(name, default, kind=float):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    if kind is bool:
+        return value.lower() in ('1', 'true', 'on', 'yes')
+    return kind(value)
+
+
+# positions of all satellites of catalog as geojson points
+@app.route('/api/satellites')
+def api_satellites():
+    current_pos = observer.current_observer()
+    positions = snapshot.snapshot(registry.get_satellites(), current_pos)
+    return jsonify(vector_data.satellites_features(positions, current_pos))
+
+
+# everything drawn on map of one satellite as geojson, arguments are the same as map form has
+@app.route('/api/map')
+def api_map():
+    name = request.args.get('sat', '')
+    sat = registry.get(name)
+    if sat is None:
+        return jsonify({"error": f'unknown satellite "{name}"'}), 404
+    current_pos = observer.current_observer()
+    return jsonify(vector_data.satellite_map(sat, current_pos,
+                                             satellite_resolution=read_argument('satellite_resolution', 0.1),
+                                             sun_resolution=read_argument('sun_resolution', 0.1),
+                                             path_resolution=read_argument('path_resolution', 100, int),
+                                             before_time=read_argument('before_time', 0, int),
+                                             after_time=read_argument('after_time', 3600, int),
+                                             draw_sat_area=read_argument('draw_sat_area', False, bool),
+                                             draw_sun_area=read_argument('draw_sun_area', False, bool),
+                                             tolerance=read_argument('tolerance', 0.05)))
+
+
+# area where is night on earth as geojson polygon
+@app.route('/api/night')
+def api_night():
+    return jsonify(vector_data.night_feature(read_argument('resolution', 1.0), read_argument('tolerance', 0.05)))
+
+
+# positions and passes of satellites seen from ground stations, the same data radar image shows
+# passes are described by flyby_pass.FLYBY_SCHEMA, their trajectories are simplified
+# satellites are given as repeated 'sat' arguments, all satellites of catalog when there is none
+@app.route('/api/radar')
+def api_radar():
+    tolerance = read_argument('tolerance', 0.5)
+    names = request.args.getlist('sat')
+    selected = registry.query(names=names) if names else registry.get_satellites()
+    stations = observer.get_stations()
+    positions = snapshot.snapshot(selected, stations[0][1])
+    time_now = datetime.datetime.now()
+    passes = pass_pool.default_pool.flyby(selected, stations, time_now,
+                                          time_now + datetime.timedelta(hours=read_argument('hours', 24)),
+                                          read_argument('angle', 0))
+    result = {"satellites": [{"name": name,
+                              "azimut": round(float(positions["azimut"][x]), 2),
+                              "elevation": round(float(positions["elevation"][x]), 2),
+                              "above": bool(positions["above"][x])}
+                             for x, name in enumerate(positions["name"])],
+              "passes": []}
+    for item in passes:
+        data = item.to_json()
+        data["trajectory"] = vector_data.coordinates(vector_data.simplify(item.trajectory, tolerance))
+        result["passes"].append(data)
+    return jsonify(result)
+
+
+# server-sent events with positions of satellites, all clients share one computation per tick
+# satellites are given as repeated 'sat' arguments, all satellites of catalog when there is none
+@app.route('/api/live')
+def api_live():
+    names = request.args.getlist('sat')
+    stream = live_stream.default_stream.subscribe(set(names) if names else None)
+    return Response(stream, mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
@@ -1,65 +1,68 @@
-from __main__ import app
+from app import app
 from flask import Flask, redirect, url_for, render_template, request, send_file, jsonify
-import matplotlib.pyplot as plt
-from pathlib import Path
-import gc
 import datetime
 
-from scripts.utils import read_tle
-from scripts.utils import read_current_pos
 from scripts.satellite import satellite
 from scripts.satellite import satellite_plot
+from scripts.satellite import registry
+from scripts.satellite import observer
+from scripts.satellite import snapshot
+from scripts.satellite import pass_pool
+from scripts.satellite import flyby_pass
+from scripts.satellite import render_cache
+from scripts.utils import read_config
 
-satellites = []
-current_pos = [0, 0]
-satellites_objects = []
+# radar png is optional, browser can draw trajectories of passes itself
+RENDER_IMAGES = bool(read_config.read_config()["render_images"])
 
 
+# returns informations about every satellite of catalog seen from current position
+# input: nothing
+# output: ([*{'name','epoch','lon','lat','alt','azimut','elevation','distance','above'}], observer)
 def update_sats():
-    global satellites, current_pos, satellites_objects
-    satellites_tle = read_tle.read_tle()
-    satellites_objects = [satellite.satellite(item) for item in satellites_tle]
-    current_pos = read_current_pos.read_current_pos()
-    satellites = [item.get_informations(current_pos) for item in satellites_objects]
+    current_pos = observer.current_observer()
+    return snapshot.get_informations(registry.get_satellites(), current_pos), current_pos
 
 @app.route('/sfr_update', methods=['POST', 'GET'])
 def satellite_flyby_radar_update():
-    global satellites, current_pos, satellites_objects
-    update_sats()
+    current_pos = observer.current_observer()
     data = request.json
-    sats_data = []
     sats_pos = []
     print(data)
-    used_names = []
-    for item in data[1]:
-        if item[1]:
-            for sat in satellites_objects:
-                if sat.satellite_object.name == item[0] and not any(used_name in sat.satellite_object.name for used_name in used_names):
-                    sats_pos.append([sat.satellite_object.name ,sat.azimut(current_pos)])
-                    used_names.append(sat.satellite_object.name)
-                    time_now = datetime.datetime.now()
-                    sat_data = sat.flyby(current_pos, time_now, time_now + datetime.timedelta(hours=int(data[0]["hours"])), int(data[0]["angle"]))
-                    sats_data.append(sat_data)
-
-    sats_data = [j for sub in sats_data for j in sub]
-    sats_data = sorted(sats_data, key=lambda l:datetime.datetime.strptime(l[1], '%H:%M:%S   %d-%b-%Y'))
+    stations = observer.get_stations()
+    selected = registry.query(names=[name for name, checked in data[1] if checked])
+    positions = snapshot.snapshot(selected, current_pos)
+    for x, sat in enumerate(selected):
+        sats_pos.append([sat.satellite_object.name, [positions["azimut"][x], positions["elevation"][x],
+                                                     int(positions["distance"][x]), bool(positions["above"][x])]])
+    time_now = datetime.datetime.now()
+    # passes of every satellite are searched in parallel and come back already sorted by rise time
+    sats_data = pass_pool.default_pool.flyby(selected, stations, time_now,
+                                             time_now + datetime.timedelta(hours=int(data[0]["hours"])),
+                                             int(data[0]["angle"]))
 
     #from pprint import pprint
     #pprint(sats_data)
 
-    plt = satellite_plot.satellite_radar(sats_data, sats_pos)
-    ROOT_DIR = str(Path(__file__).parent.parent.parent.as_posix())  # This is your Project Root
-    plt.savefig(ROOT_DIR + "/static/dynamic_images" + f'/radar.png')
-    print(f'map for "radar" was created and saved')
-    plt.clf()
-    plt.close()
-    gc.collect()
+    # radar is drawn from point of view of first station, client can skip it with "render": false
+    # image stays in memory and is served by /render/<key>
+    radar = None
+    if RENDER_IMAGES and data[0].get("render", True):
+        image = satellite_plot.satellite_radar([item for item in sats_data if item.station == stations[0][0]],
+                                               sats_pos)
+        radar = "/render/" + render_cache.default_cache.store(*image.encode(), name="radar")
+        print(f'map for "radar" was created')
 
     print("update")
-    return jsonify(sats_data)
+    # times are turned into local time of stations only here
+    return jsonify({"passes": [item.to_json() for item in sats_data], "radar": radar})
+
+# returns json schema of passes sent by /sfr_update
+@app.route('/sfr_schema')
+def satellite_flyby_radar_schema():
+    return jsonify(flyby_pass.FLYBY_SCHEMA)
 
 @app.route('/sfr')
 def satellite_flyby_radar():
-    global satellites, current_pos, satellites_objects
-    update_sats()
+    satellites, current_pos = update_sats()
     return render_template("satellite_flyby_radar.html", satellites=satellites)
@@ -1,122 +1,139 @@
-from __main__ import app
-from flask import Flask, redirect, url_for, render_template, request, send_file, jsonify
-import matplotlib.pyplot as plt
+from app import app
+from flask import Flask, redirect, url_for, render_template, request, send_file, jsonify, Response
 from pathlib import Path
-import gc
+import json
 
-from scripts.utils import read_tle
-from scripts.utils import read_current_pos
 from scripts.satellite import satellite
 from scripts.satellite import satellite_plot
+from scripts.satellite import registry
+from scripts.satellite import observer
+from scripts.satellite import snapshot
+from scripts.satellite import render_pool
+from scripts.satellite import render_jobs
+from scripts.satellite import render_cache
+from scripts.utils import read_config
 
-satellites = []
-current_pos = [0, 0]
-satellites_objects = []
+# png maps are optional, /api serves the same data as vectors
+RENDER_IMAGES = bool(read_config.read_config()["render_images"])
 
-drawing = False
-stop_processes = False
 
-
-@app.route('/stop', methods=['GET', 'POST'])
-def stop():
-    global stop_processes, drawing
-    stop_processes = True
-    drawing = False
+# stops render job for client that submitted it, maps of other clients are never cancelled
+@app.route('/stop/<job_id>', methods=['GET', 'POST'])
+def stop(job_id):
+    if render_jobs.default_jobs.cancel(job_id) is None:
+        return jsonify({"error": "unknown job"}), 404
     return "STOPPED"
 
 
+# returns satellite_map keyword arguments from map form of one satellite
+# input: form values (checkbox is True or present in form when checked)
+# output: dict
+def read_map_options(form):
+    return {"satellite_resolution": float(form['form_satellite_resolution']),
+            "sun_resolution": float(form['form_sun_resolution']),
+            "path_resolution": int(form['form_path_resolution']),
+            "before_time": int(form['form_before_time']),
+            "after_time": int(form['form_after_time']),
+            "draw_sat_area": bool(form.get('form_satellite_area')),
+            "draw_sun_area": bool(form.get('form_sun_area')),
+            }
+
+
+# maps are drawn in background, both endpoints return id of job right away
+# every request reads satellites it needs itself, nothing is shared between requests
 @app.route('/auto', methods=['GET', 'POST'])
 def auto():
-    global satellites, current_pos, satellites_objects, drawing, stop_processes
+    if not RENDER_IMAGES:
+        return jsonify({"error": "drawing maps is disabled, use /api/map"}), 404
     data = request.json
-    if not drawing:
-        print("drawing maps...")
-        drawing = True
-        for x in range(len(satellites)):
-            if not stop_processes:
-                name = satellites[x]["name"]
-                print(f'drawing map for "{name}"')
-                current_pos = read_current_pos.read_current_pos()
-                sun_resolution = float(data[x][satellites[x]["name"]]['form_sun_resolution'])
-                satellite_resolution = float(data[x][satellites[x]["name"]]['form_satellite_resolution'])
-                path_resolution = int(data[x][satellites[x]["name"]]['form_path_resolution'])
-                before_time = int(data[x][satellites[x]["name"]]['form_before_time'])
-                after_time = int(data[x][satellites[x]["name"]]['form_after_time'])
-                draw_sat = False
-                if data[x][satellites[x]["name"]]['form_satellite_area']:
-                    draw_sat = True
-                draw_sun = False
-                if data[x][satellites[x]["name"]]['form_sun_area']:
-                    draw_sun = True
-
-                plt = satellite_plot.satellite_map(satellites_objects[x],
-                                                   current_pos,
-                                                   satellite_resolution=satellite_resolution,
-                                                   sun_resolution=sun_resolution,
-                                                   path_resolution=path_resolution,
-                                                   before_time=before_time,
-                                                   after_time=after_time,
-                                                   draw_sat_area=draw_sat,
-                                                   draw_sun_area=draw_sun)
-                ROOT_DIR = str(Path(__file__).parent.parent.parent.as_posix())  # This is your Project Root
-                plt.savefig(ROOT_DIR + "/static/dynamic_images" + f'/{name}.png')
-                print(f'map for "{name}" was created and saved')
-                plt.clf()
-                plt.close()
-                gc.collect()
-            else:
-                return "STOP"
-        drawing = False
-        return "SUCCESS"
-    else:
-        return "WAIT"
+    print("drawing maps...")
+    current_pos = observer.current_observer()
+    maps = []
+    # every item is {name of satellite: form of its map}, other items are settings of page
+    for item in data:
+        for name, form in item.items():
+            sat = registry.get(name)
+            if sat is not None:
+                maps.append([name, sat.tle, current_pos, read_map_options(form)])
+    return jsonify({"job": render_jobs.default_jobs.submit(maps)})
 
 
 @app.route('/draw', methods=['GET', 'POST'])
 def draw():
-    global satellites, current_pos, satellites_objects, drawing
+    if not RENDER_IMAGES:
+        return jsonify({"error": "drawing maps is disabled, use /api/map"}), 404
     data = request.form
-    if not drawing:
-        drawing = True
-        for x in range(len(satellites)):
-            if satellites[x]["name"] == data['sat']:
-                print(f'drawing map for "{data["sat"]}"')
-                current_pos = read_current_pos.read_current_pos()
-                sun_resolution = float(data['form_sun_resolution'])
-                satellite_resolution = float(data['form_satellite_resolution'])
-                path_resolution = int(data['form_path_resolution'])
-                before_time = int(data['form_before_time'])
-                after_time = int(data['form_after_time'])
-                draw_sat = False
-                if 'form_satellite_area' in data:
-                    draw_sat = True
-                draw_sun = False
-                if 'form_sun_area' in data:
-                    draw_sun = True
-
-                plt = satellite_plot.satellite_map(satellites_objects[x],
-                                                   current_pos,
-                                                   satellite_resolution=satellite_resolution,
-                                                   sun_resolution=sun_resolution,
-                                                   path_resolution=path_resolution,
-                                                   before_time=before_time,
-                                                   after_time=after_time,
-                                                   draw_sat_area=draw_sat,
-                                                   draw_sun_area=draw_sun)
-                ROOT_DIR = str(Path(__file__).parent.parent.parent.as_posix())  # This is your Project Root
-                plt.savefig(ROOT_DIR + "/static/dynamic_images" + f'/{data["sat"]}.png')
-                plt.close()
-                print(f'map for "{data["sat"]}" was created and saved')
-                drawing = False
-                return "SUCCESS"
-    return 'WAIT'
+    sat = registry.get(data['sat'])
+    if sat is not None:
+        print(f'drawing map for "{data["sat"]}"')
+        current_pos = observer.current_observer()
+        maps = [[data['sat'], sat.tle, current_pos, read_map_options(data)]]
+        return jsonify({"job": render_jobs.default_jobs.submit(maps)})
+    return jsonify({"error": f'unknown satellite "{data["sat"]}"'}), 404
+
+
+# returns encoded image from render cache with its key as etag, 304 when browser already has it
+# input: (key, value of Cache-Control header)
+# output: flask Response
+def image_response(key, cache_control):
+    image = render_cache.default_cache.get(key) if key is not None else None
+    if image is None:
+        return jsonify({"error": "unknown image"}), 404
+    response = Response(image[0], mimetype=image[1])
+    response.set_etag(key)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+
+# rendered map or radar, key is made of everything that changes picture so image under it never changes
+@app.route('/render/<key>')
+def render_image(key):
+    return image_response(key, 'public, max-age=31536000, immutable')
+
+
+# last rendered map of satellite, browser has to ask again but gets empty response while image is the same
+@app.route('/map/<path:name>')
+def latest_image(name):
+    return image_response(render_cache.default_cache.get_latest(name), 'no-cache')
+
+
+@app.route('/auto_progress', methods=['GET', 'POST'])
+def auto_progress():
+    return jsonify(render_pool.default_pool.get_progress())
+
+
+@app.route('/job/<job_id>')
+def job_status(job_id):
+    job = render_jobs.default_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(job)
+
+
+# server-sent events with state of job, stream ends when job is finished
+@app.route('/job/<job_id>/events')
+def job_events(job_id):
+    def stream():
+        version = None
+        while True:
+            if version is None:
+                job = render_jobs.default_jobs.get(job_id)
+            else:
+                job = render_jobs.default_jobs.wait(job_id, version)
+            if job is None:
+                yield 'event: error\ndata: "unknown job"\n\n'
+                return
+            if job["version"] != version:
+                version = job["version"]
+                yield f'data: {json.dumps(job)}\n\n'
+            if job["finished"] is not None:
+                return
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 
 @app.route('/ssm')
 def satellite_static_map():
-    global satellites, current_pos, satellites_objects
-    satellites_tle = read_tle.read_tle()
-    satellites_objects = [satellite.satellite(item) for item in satellites_tle]
-    current_pos = read_current_pos.read_current_pos()
-    satellites = [item.get_informations(current_pos) for item in satellites_objects]
+    satellites_objects = registry.get_satellites()
+    current_pos = observer.current_observer()
+    satellites = snapshot.get_informations(satellites_objects, current_pos)
     return render_template("satellite_static_map.html", satellites=satellites)
\ No newline at end of file
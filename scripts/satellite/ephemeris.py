@@ -0,0 +1,126 @@
+from sgp4.api import SatrecArray
+from skyfield.sgp4lib import theta_GMST1982
+
+import numpy as np
+import math
+
+from scripts.satellite import footprint
+
+# rotation of earth in itrs frame (rad/s)
+EARTH_ROTATION = 7.2921150e-5
+
+
+# returns itrs positions and velocities of satellites at evenly spaced moments
+# all satellites and all moments are propagated in one sgp4 call
+# input: ([*skyfield EarthSatellite], skyfield Time array of moments)
+# output: array (satellites, moments, 6) with x, y, z in km and vx, vy, vz in km/s
+def sample(satellite_objects, t):
+    # sgp4 takes utc julian date, ut1 minus dut1 is utc
+    jd = t.whole
+    fraction = t.ut1_fraction - t.dut1 / 86400
+    error, position, velocity = SatrecArray([item.model for item in satellite_objects]).sgp4(jd, fraction)
+
+    # teme differs from itrs (without polar motion, like skyfield uses) only by rotation of earth about z axis,
+    # so one angle per moment is enough instead of full precession and nutation matrices
+    theta = theta_GMST1982(t.whole, t.ut1_fraction)[0]
+    cos = np.cos(theta)[np.newaxis, :]
+    sin = np.sin(theta)[np.newaxis, :]
+    samples = np.empty(position.shape[:2] + (6,))
+    for offset, vector in ((0, position), (3, velocity)):
+        samples[:, :, offset] = cos * vector[:, :, 0] + sin * vector[:, :, 1]
+        samples[:, :, offset + 1] = -sin * vector[:, :, 0] + cos * vector[:, :, 1]
+        samples[:, :, offset + 2] = vector[:, :, 2]
+    # itrs frame rotates with earth
+    samples[:, :, 3] += EARTH_ROTATION * samples[:, :, 1]
+    samples[:, :, 4] -= EARTH_ROTATION * samples[:, :, 0]
+    return samples
+
+
+# returns positions between samples using cubic hermite interpolation of positions and velocities
+# input: (array (..., moments, 6) from sample, step between samples in seconds, seconds from first sample)
+# output: itrs positions in km with shape (..., *seconds.shape, 3)
+def hermite(samples, step, seconds):
+    seconds = np.asarray(seconds, dtype=float)
+    index = np.clip((seconds // step).astype(int), 0, samples.shape[-2] - 2)
+    s = (seconds / step - index)[..., np.newaxis]
+    first = samples[..., index, :]
+    second = samples[..., index + 1, :]
+    h00 = 2 * s ** 3 - 3 * s ** 2 + 1
+    h10 = s ** 3 - 2 * s ** 2 + s
+    h01 = -2 * s ** 3 + 3 * s ** 2
+    h11 = s ** 3 - s ** 2
+    return (h00 * first[..., :3] + h10 * step * first[..., 3:] +
+            h01 * second[..., :3] + h11 * step * second[..., 3:])
+
+
+# returns geodetic coordinates of itrs positions on wgs84 ellipsoid
+# input: itrs positions in km with shape (..., 3)
+# output: (longitude in degrees, latitude in degrees, altitude in km)
+def geodetic(position):
+    x, y, z = position[..., 0], position[..., 1], position[..., 2]
+    p = np.hypot(x, y)
+    lat = np.arctan2(z, p * (1 - footprint.EARTH_E2))
+    for _ in range(5):
+        n = footprint.EARTH_RADIUS / np.sqrt(1 - footprint.EARTH_E2 * np.sin(lat) ** 2)
+        altitude = p / np.cos(lat) - n
+        lat = np.arctan2(z, p * (1 - footprint.EARTH_E2 * n / (n + altitude)))
+    n = footprint.EARTH_RADIUS / np.sqrt(1 - footprint.EARTH_E2 * np.sin(lat) ** 2)
+    altitude = p / np.cos(lat) - n
+    return np.degrees(np.arctan2(y, x)), np.degrees(lat), altitude
+
+
+# returns direction from device to itrs positions
+# input: (itrs positions in km with shape (..., 3), [longitude, latitude] of device)
+# output: (azimut in degrees, elevation in degrees, distance in km)
+def look_angles(position, current_position):
+    lon, lat = np.radians(float(current_position[0])), np.radians(float(current_position[1]))
+    station, up = footprint.ground_vectors(np.degrees(lon), np.degrees(lat))
+    east = np.array([-np.sin(lon), np.cos(lon), 0])
+    north = np.array([-np.sin(lat) * np.cos(lon), -np.sin(lat) * np.sin(lon), np.cos(lat)])
+    difference = position - station
+    distance = np.sqrt(np.sum(difference ** 2, axis=-1))
+    elevation = np.degrees(np.arcsin(difference @ up / distance))
+    azimut = np.degrees(np.arctan2(difference @ east, difference @ north)) % 360
+    return azimut, elevation, distance
+
+
+# single moment versions of functions above, plain floats are many times faster than numpy for one position
+
+# returns position between two samples using cubic hermite interpolation
+# input: (sample before, sample after, step between them in seconds, seconds from sample before)
+# output: (x, y, z) itrs in km
+def hermite_point(first, second, step, seconds):
+    s = seconds / step
+    h00 = 2 * s ** 3 - 3 * s ** 2 + 1
+    h10 = (s ** 3 - 2 * s ** 2 + s) * step
+    h01 = -2 * s ** 3 + 3 * s ** 2
+    h11 = (s ** 3 - s ** 2) * step
+    return tuple(h00 * first[i] + h10 * first[i + 3] + h01 * second[i] + h11 * second[i + 3] for i in range(3))
+
+
+# returns geodetic coordinates of itrs position on wgs84 ellipsoid
+# input: (x, y, z) itrs in km
+# output: (longitude in degrees, latitude in degrees, altitude in km)
+def geodetic_point(position):
+    x, y, z = position
+    p = math.hypot(x, y)
+    lat = math.atan2(z, p * (1 - footprint.EARTH_E2))
+    for _ in range(5):
+        n = footprint.EARTH_RADIUS / math.sqrt(1 - footprint.EARTH_E2 * math.sin(lat) ** 2)
+        altitude = p / math.cos(lat) - n
+        lat = math.atan2(z, p * (1 - footprint.EARTH_E2 * n / (n + altitude)))
+    n = footprint.EARTH_RADIUS / math.sqrt(1 - footprint.EARTH_E2 * math.sin(lat) ** 2)
+    altitude = p / math.cos(lat) - n
+    return math.degrees(math.atan2(y, x)), math.degrees(lat), altitude
+
+
+# returns direction from device to itrs position
+# input: ((x, y, z) itrs in km, observer)
+# output: (azimut in degrees, elevation in degrees, distance in km)
+def look_angles_point(position, device):
+    difference = [position[i] - device.station[i] for i in range(3)]
+    distance = math.sqrt(sum(item ** 2 for item in difference))
+    up = sum(difference[i] * device.up[i] for i in range(3))
+    east = sum(difference[i] * device.east[i] for i in range(3))
+    north = sum(difference[i] * device.north[i] for i in range(3))
+    return math.degrees(math.atan2(east, north)) % 360, math.degrees(math.asin(up / distance)), distance
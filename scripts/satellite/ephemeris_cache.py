@@ -0,0 +1,198 @@
+from pathlib import Path
+import numpy as np
+import json
+import threading
+import os
+
+from scripts.utils import read_config
+from scripts.utils import clock
+from scripts.satellite import ephemeris
+from scripts.satellite import registry
+from scripts.satellite import satellite
+
+ROOT_DIR = str(Path(__file__).parent.parent.parent.as_posix())  # This is your Project Root
+CACHE_DIR = ROOT_DIR + "/cache"
+
+# orbital elements of every satellite as parsed by sgp4 (angles in radians, mean motion in radians per minute)
+ELEMENTS = np.dtype([("name", "U64"),
+                     ("norad", "i4"),
+                     ("line1", "U69"),
+                     ("line2", "U69"),
+                     ("epoch", "f8"),  # julian date utc
+                     ("inclination", "f8"),
+                     ("raan", "f8"),
+                     ("eccentricity", "f8"),
+                     ("perigee", "f8"),
+                     ("mean_anomaly", "f8"),
+                     ("mean_motion", "f8"),
+                     ("bstar", "f8"),
+                     ])
+
+
+# parsed elements and ephemeris grid of whole catalog, arrays can be memory mapped from cache files
+class ephemeris_table:
+    def __init__(self, key, stamp, step, elements, samples):
+        self.key = key
+        self.stamp = stamp  # tt minutes from julian date 0 of first sample
+        self.start = stamp / 1440  # tt julian date of first sample
+        self.step = step  # seconds between samples
+        self.elements = elements
+        self.samples = samples  # (satellites, moments, 6) itrs km and km/s
+        self.end = self.start + step * (samples.shape[1] - 1) / 86400
+        self.rows = {f'{item["name"]}\n{item["line1"]}\n{item["line2"]}': row for row, item in enumerate(elements)}
+
+    # returns True when moment is inside of ephemeris grid
+    # input: skyfield Time
+    # output: bool
+    def covers(self, t):
+        return self.start <= t.tt <= self.end
+
+    # returns row of satellite in table or None when satellite is not in it
+    # input: satellite
+    # output: int
+    def row(self, satellite_item):
+        return self.rows.get(satellite_item.tle)
+
+    # returns interpolated itrs positions of satellites
+    # input: (list of rows, skyfield Time)
+    # output: positions in km with shape (rows, *t.shape, 3)
+    def positions(self, rows, t):
+        # julian date is split to whole days and fraction, single float would lose about 40 microseconds
+        whole, minute = divmod(self.stamp, 1440)
+        seconds = ((t.whole - whole) + (t.tt_fraction - minute / 1440)) * 86400
+        # only samples around requested moments are read from mapped file
+        last_index = self.samples.shape[1] - 2
+        first = int(np.clip(np.min(seconds) // self.step, 0, last_index))
+        last = int(np.clip(np.max(seconds) // self.step, 0, last_index)) + 2
+        window = np.asarray(self.samples[:, first:last])[rows]
+        return ephemeris.hermite(window, self.step, seconds - first * self.step)
+
+
+# keeps ephemeris of tle config in .npy files so restarted server and worker processes only map them
+# cache is built again when tle config changes or when less than half of its time window is left
+class ephemeris_cache:
+    def __init__(self, directory=CACHE_DIR, hours=24, step=60):
+        self.directory = directory
+        self.hours = hours
+        self.step = step
+        self.lock = threading.Lock()
+        self.table = None
+
+    # returns ephemeris table of current tle config which covers given moment
+    # input: skyfield Time (now when not given)
+    # output: ephemeris_table or None when files of new window were removed by other process before mapping
+    def get(self, t=None):
+        if t is None:
+            t = clock.skyfield_time(satellite.ts)
+        # digest of tle config changes with its content, so cache of edited config is never used
+        satellites = registry.get_satellites()
+        key = registry.default_registry.digest
+        with self.lock:
+            if not self.usable(self.table, key, t):
+                table = self.load(key)
+                if not self.usable(table, key, t):
+                    table = self.build(key, satellites, t)
+                self.table = table
+            return self.table
+
+    def usable(self, table, key, t):
+        return (table is not None and table.key == key and table.start <= t.tt and
+                t.tt + self.hours / 48 <= table.end)
+
+    def path(self, key, kind):
+        return f'{self.directory}/{key}.{kind}'
+
+    # maps cache files of tle config into memory
+    # input: key of tle config
+    # output: ephemeris_table or None when there are no usable files
+    def load(self, key):
+        try:
+            with open(self.path(key, 'json'), 'r') as file:
+                meta = json.load(file)
+            if meta["step"] != self.step:
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        return self.load_window(key, meta["stamp"])
+
+    # maps data files of one window into memory
+    # input: (key of tle config, tt minutes of first sample)
+    # output: ephemeris_table or None when files do not exist
+    def load_window(self, key, stamp):
+        name = f'{key}-{stamp}'
+        try:
+            elements = np.load(self.path(name, 'elements.npy'), mmap_mode='r')
+            samples = np.load(self.path(name, 'ephemeris.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return ephemeris_table(key, stamp, self.step, elements, samples)
+
+    # returns first moment of window cache file belongs to, json of tle config counts as its window
+    # input: name of file in cache directory
+    # output: tt minutes or None when file is not part of cache
+    def window_stamp(self, item):
+        if item.endswith('.json'):
+            try:
+                with open(f'{self.directory}/{item}', 'r') as file:
+                    return int(json.load(file)["stamp"])
+            except (OSError, ValueError, KeyError, TypeError):
+                return None
+        name = item.split('.')[0]
+        try:
+            return int(name.rsplit('-', 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    # propagates all satellites over cache window and saves result
+    # input: (key of tle config, [*satellite], skyfield Time where window starts)
+    # output: ephemeris_table
+    def build(self, key, satellites, t):
+        elements = np.zeros(len(satellites), dtype=ELEMENTS)
+        for row, item in enumerate(satellites):
+            model = item.satellite_object.model
+            name, line1, line2 = item.tle.splitlines()
+            elements[row] = (name, model.satnum, line1, line2, model.jdsatepoch + model.jdsatepochF,
+                             model.inclo, model.nodeo, model.ecco, model.argpo, model.mo, model.no_kozai,
+                             model.bstar)
+
+        # window starts at whole minute so every process that builds it gets the same grid
+        stamp = int(np.floor(t.tt * 1440))
+        moments = int(self.hours * 3600 / self.step) + 1
+        if satellites:
+            whole, minute = divmod(stamp, 1440)
+            times = satellite.ts.tt_jd(whole, minute / 1440 + np.arange(moments) * self.step / 86400)
+            samples = ephemeris.sample([item.satellite_object for item in satellites], times)
+        else:
+            samples = np.zeros((0, moments, 6))
+
+        # every window has its own data files and json pointing to them is replaced last,
+        # so readers never see half written cache or data of other window
+        name = f'{key}-{stamp}'
+        os.makedirs(self.directory, exist_ok=True)
+        for kind, array in (('elements.npy', elements), ('ephemeris.npy', samples)):
+            temporary_path = f'{self.path(name, kind)}.{os.getpid()}.tmp'
+            with open(temporary_path, 'wb') as file:
+                np.save(file, array)
+            os.replace(temporary_path, self.path(name, kind))
+        temporary_path = f'{self.path(key, "json")}.{os.getpid()}.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump({"stamp": stamp, "step": self.step}, file)
+        os.replace(temporary_path, self.path(key, 'json'))
+
+        # only windows older than this one are removed, other process may have just saved newer window
+        # (or window of other tle config) and its files must stay, mapped files stay readable on posix
+        for item in os.listdir(self.directory):
+            item_stamp = self.window_stamp(item)
+            if item.endswith('.tmp') or item == f'{key}.json' or item_stamp is None or item_stamp >= stamp:
+                continue
+            try:
+                os.remove(f'{self.directory}/{item}')
+            except OSError:
+                pass
+        print(f'ephemeris of {len(satellites)} satellites was saved to cache')
+        # json may already point to newer window of other process, this process maps window it has built
+        return self.load_window(key, stamp)
+
+
+config = read_config.read_config()
+default_cache = ephemeris_cache(hours=config["ephemeris_hours"], step=config["ephemeris_step"])
@@ -0,0 +1,76 @@
+import datetime
+import pytz
+
+# local times of events are shown in this format
+TIME_FORMAT = '%H:%M:%S   %d-%b-%Y'
+
+# json schema of one pass as returned by /sfr_update
+FLYBY_SCHEMA = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "title": "flyby pass",
+    "type": "object",
+    "properties": {
+        "satellite": {"type": "string", "description": "name of satellite"},
+        "station": {"type": "string", "description": "name of ground station"},
+        "timezone": {"type": "string", "description": "timezone of station used for local times"},
+        "rise": {"type": "number", "description": "unix seconds when satellite rises above minimum angle"},
+        "culminate": {"type": "number", "description": "unix seconds of highest elevation"},
+        "set": {"type": "number", "description": "unix seconds when satellite sets below minimum angle"},
+        "rise_local": {"type": "string", "description": f"rise in local time of station ({TIME_FORMAT})"},
+        "culminate_local": {"type": "string", "description": f"culmination in local time of station ({TIME_FORMAT})"},
+        "set_local": {"type": "string", "description": f"set in local time of station ({TIME_FORMAT})"},
+        "trajectory": {"type": "array",
+                       "description": "[azimut, elevation] in degrees from rise to set",
+                       "items": {"type": "array", "items": {"type": "number"}, "minItems": 2, "maxItems": 2}},
+    },
+    "required": ["satellite", "station", "timezone", "rise", "culminate", "set",
+                 "rise_local", "culminate_local", "set_local", "trajectory"],
+}
+
+
+# returns unix seconds of skyfield Time
+# input: skyfield Time (single moment)
+# output: seconds (float)
+def unix_time(t):
+    return t.utc_datetime().timestamp()
+
+
+# one pass of satellite over ground station, times are unix seconds and are turned into local time
+# of station only when pass is sent to browser
+class flyby_pass:
+    __slots__ = ('satellite', 'station', 'rise', 'culminate', 'set_below', 'trajectory', 'tz')
+
+    def __init__(self, satellite, station, rise, culminate, set_below, trajectory, tz=pytz.utc):
+        self.satellite = satellite
+        self.station = station
+        self.rise = rise
+        self.culminate = culminate
+        self.set_below = set_below
+        self.trajectory = trajectory  # [*[azimut, elevation]]
+        self.tz = tz
+
+    def __repr__(self):
+        return (f'flyby_pass({self.satellite!r}, {self.station!r}, rise={self.local_time(self.rise)!r}, '
+                f'set={self.local_time(self.set_below)!r})')
+
+    # returns moment in local time of station
+    # input: unix seconds
+    # output: string in TIME_FORMAT
+    def local_time(self, seconds):
+        return datetime.datetime.fromtimestamp(seconds, self.tz).strftime(TIME_FORMAT)
+
+    # returns pass as dict described by FLYBY_SCHEMA
+    # input: nothing
+    # output: dict
+    def to_json(self):
+        return {"satellite": self.satellite,
+                "station": self.station,
+                "timezone": self.tz.zone,
+                "rise": self.rise,
+                "culminate": self.culminate,
+                "set": self.set_below,
+                "rise_local": self.local_time(self.rise),
+                "culminate_local": self.local_time(self.culminate),
+                "set_local": self.local_time(self.set_below),
+                "trajectory": self.trajectory,
+                }
@@ -0,0 +1,59 @@
+from skyfield.framelib import itrs
+
+import numpy as np
+from scipy.spatial import ConvexHull
+
+# wgs84 ellipsoid (same one skyfield uses for wgs84.latlon)
+EARTH_RADIUS = 6378.137  # km
+EARTH_FLATTENING = 1 / 298.257223563
+EARTH_E2 = EARTH_FLATTENING * (2 - EARTH_FLATTENING)
+
+
+# returns grid of lon/lat cells used by visible zone calculations
+# input: resolution in float (minimum:0.1 optimal:0.2 ultra:1)
+# output: (lon 2d array in degrees, lat 2d array in degrees)
+def lonlat_grid(resolution):
+    lon = np.arange(int(360 * resolution)) / resolution - 180
+    lat = np.arange(int(180 * resolution)) / resolution - 90
+    return np.meshgrid(lon, lat)
+
+
+# returns itrs position and local zenith unit vector of every grid point on wgs84 ellipsoid
+# input: (lon array in degrees, lat array in degrees)
+# output: (positions in km with shape (3, *lon.shape), zenith unit vectors with the same shape)
+def ground_vectors(lon, lat):
+    lon = np.radians(lon)
+    lat = np.radians(lat)
+    sin_lat = np.sin(lat)
+    cos_lat = np.cos(lat)
+    n = EARTH_RADIUS / np.sqrt(1 - EARTH_E2 * sin_lat ** 2)
+    up = np.array([cos_lat * np.cos(lon), cos_lat * np.sin(lon), sin_lat])
+    position = np.array([n * up[0], n * up[1], n * (1 - EARTH_E2) * sin_lat])
+    return position, up
+
+
+# returns elevation of satellite seen from every cell of lat/lon grid
+# satellite position is computed only once, all cells are calculated in one numpy pass
+# input: (skyfield EarthSatellite, skyfield Time, resolution in float)
+# output: (lon 2d array, lat 2d array, elevation 2d array in degrees)
+def elevation_grid(satellite_object, t, resolution):
+    lon, lat = lonlat_grid(resolution)
+    satellite_xyz = satellite_object.at(t).frame_xyz(itrs).km
+    position, up = ground_vectors(lon, lat)
+    difference = satellite_xyz[:, np.newaxis, np.newaxis] - position
+    distance = np.sqrt(np.sum(difference ** 2, axis=0))
+    elevation = np.degrees(np.arcsin(np.sum(difference * up, axis=0) / distance))
+    return lon, lat, elevation
+
+
+# returns polygon of area visible from satellite
+# input: (skyfield EarthSatellite, skyfield Time, resolution in float)
+# output: [*[x,y]]
+def visible_zone(satellite_object, t, resolution):
+    lon, lat, elevation = elevation_grid(satellite_object, t, resolution)
+    visible = elevation > 0
+    points = np.column_stack((lon[visible], lat[visible]))
+    hull = ConvexHull(points)
+    converted = points[hull.vertices].tolist()
+    converted.append(converted[0])
+    return converted
@@ -0,0 +1,104 @@
+import numpy as np
+import threading
+import json
+import time
+
+from scripts.utils import read_config
+from scripts.satellite import registry
+from scripts.satellite import observer
+from scripts.satellite import snapshot
+from scripts.satellite import flyby_pass
+
+
+# returns positions of all satellites of catalog in compact form, one list per value
+# input: nothing
+# output: {'time','name','lon','lat','alt','azimut','elevation','above'}
+def positions():
+    data = snapshot.snapshot(registry.get_satellites(), observer.current_observer())
+    return {"time": round(float(flyby_pass.unix_time(data["time"])), 3),
+            "name": list(data["name"]),
+            "lon": np.round(data["lon"], 4).tolist(),
+            "lat": np.round(data["lat"], 4).tolist(),
+            "alt": np.round(data["alt"], 1).tolist(),
+            "azimut": np.round(data["azimut"], 2).tolist(),
+            "elevation": np.round(data["elevation"], 2).tolist(),
+            "above": np.asarray(data["above"], dtype=bool).tolist(),
+            }
+
+
+# returns only chosen satellites from positions
+# input: (dict from positions, set of names)
+# output: dict like from positions
+def select(data, names):
+    rows = [x for x, name in enumerate(data["name"]) if name in names]
+    return {key: value if key == "time" else [value[x] for x in rows] for key, value in data.items()}
+
+
+# computes positions of satellites once per tick and sends them to every connected client
+# background thread runs only while at least one client is connected
+class live_stream:
+    def __init__(self, interval=1.0):
+        self.interval = interval  # seconds between ticks
+        self.condition = threading.Condition()
+        self.clients = 0
+        self.thread = None
+        self.version = 0
+        self.data = None
+        self.message = None
+
+    def run(self):
+        while True:
+            with self.condition:
+                if self.clients == 0:
+                    self.thread = None
+                    return
+            started = time.time()
+            try:
+                data = positions()
+                message = json.dumps(data)
+            except Exception as e:
+                print(f'live positions failed: {e!r}')
+            else:
+                with self.condition:
+                    self.data = data
+                    self.message = message
+                    self.version += 1
+                    self.condition.notify_all()
+            time.sleep(max(0.0, self.interval - (time.time() - started)))
+
+    # returns server-sent events with positions, one event per tick
+    # clients that want all satellites share one encoded message
+    # input: set of names of satellites (all when None)
+    # output: generator of event strings
+    def subscribe(self, names=None):
+        with self.condition:
+            self.clients += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+        try:
+            # version 0 means there are no positions yet, client gets positions of last tick right away
+            version = 0
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.version != version, timeout=max(15.0, self.interval * 2))
+                    if self.version == version:
+                        message = None
+                    else:
+                        version = self.version
+                        message = self.message if names is None else json.dumps(select(self.data, names))
+                # comment keeps connection open when tick takes too long
+                yield ': keep-alive\n\n' if message is None else f'data: {message}\n\n'
+        finally:
+            with self.condition:
+                self.clients -= 1
+
+    # returns number of connected clients
+    # input: nothing
+    # output: int
+    def get_clients(self):
+        with self.condition:
+            return self.clients
+
+
+default_stream = live_stream(read_config.read_config()["live_interval"])
@@ -0,0 +1,98 @@
+from skyfield.api import wgs84
+
+from timezonefinder import TimezoneFinder
+
+import threading
+import math
+import weakref
+import pytz
+
+from scripts.utils import read_current_pos
+from scripts.satellite import footprint
+
+# loading timezone database is expensive so it is done only once per process
+timezone_finder = None
+lock = threading.Lock()
+observers = {}
+
+
+# returns shared TimezoneFinder, it is created on first use
+# input: nothing
+# output: TimezoneFinder
+def get_timezone_finder():
+    global timezone_finder
+    with lock:
+        if timezone_finder is None:
+            timezone_finder = TimezoneFinder()
+        return timezone_finder
+
+
+# everything about device position that does not change between calls
+# it can be used everywhere [longitude, latitude] of device is expected
+class observer:
+    # in order to create observer class you must deliver [longitude, latitude] of device to it
+    def __init__(self, current_position):
+        self.position = [float(current_position[0]), float(current_position[1])]
+        #                          lat y                 lon x
+        self.topos = wgs84.latlon(self.position[1], self.position[0])
+        #                                                     lon x                  lat y
+        self.timezone = get_timezone_finder().timezone_at(lng=self.position[0], lat=self.position[1])
+        self.tz = pytz.timezone(self.timezone) if self.timezone else pytz.utc
+        self.differences = weakref.WeakKeyDictionary()
+
+        # itrs position of device and directions of its horizon, used with interpolated satellite positions
+        lon, lat = math.radians(self.position[0]), math.radians(self.position[1])
+        station, up = footprint.ground_vectors(self.position[0], self.position[1])
+        self.station = tuple(station.tolist())
+        self.up = tuple(up.tolist())
+        self.east = (-math.sin(lon), math.cos(lon), 0.0)
+        self.north = (-math.sin(lat) * math.cos(lon), -math.sin(lat) * math.sin(lon), math.cos(lat))
+
+    def __getitem__(self, index):
+        return self.position[index]
+
+    def __iter__(self):
+        return iter(self.position)
+
+    def __len__(self):
+        return len(self.position)
+
+    # returns skyfield vector from device to satellite, it is built only once per satellite
+    # input: skyfield EarthSatellite
+    # output: skyfield VectorSum
+    def difference(self, satellite_object):
+        difference = self.differences.get(satellite_object)
+        if difference is None:
+            difference = satellite_object - self.topos
+            self.differences[satellite_object] = difference
+        return difference
+
+
+# returns observer for given device position, observers are shared between calls
+# input: [longitude, latitude] of device or observer
+# output: observer
+def get_observer(current_position):
+    if isinstance(current_position, observer):
+        return current_position
+    key = (float(current_position[0]), float(current_position[1]))
+    with lock:
+        device = observers.get(key)
+    if device is None:
+        device = observer(key)
+        with lock:
+            observers[key] = device
+    return device
+
+
+# returns observer of position saved in config
+# input: nothing
+# output: observer
+def current_observer():
+    return get_observer(read_current_pos.read_current_pos())
+
+
+# returns observers of all ground stations saved in config, first one is current observer
+# input: nothing
+# output: [*[name of station, observer]]
+def get_stations():
+    return [[name, get_observer(position)] for name, position in read_current_pos.read_stations()]
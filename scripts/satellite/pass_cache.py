@@ -0,0 +1,128 @@
+from collections import OrderedDict
+import threading
+import math
+
+# passes in progress at the end of cached window are searched again from at least this far back (days)
+PASS_MARGIN = 3 / 24
+# two events closer than this are the same event (days)
+SAME_EVENT = 1 / 86400
+
+
+# keeps predicted passes for every (tle, device position, minimum angle)
+# when requested window slides forward only the new part of it is calculated
+# least recently used entries are evicted when there is more than max_entries of them
+class pass_cache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    # returns complete passes of satellite that rise and set inside given window
+    # input: (satellite, [longitude, latitude], skyfield Time start, skyfield Time end, minimum angle to trigger)
+    # output: *[rise Time, culminate Time, set below Time, *[azimut, elevation]]
+    def get_passes(self, satellite, current_position, time_start, time_end, minimum_angle):
+        return self.get_passes_stations(satellite, [current_position], time_start, time_end, minimum_angle)[0]
+
+    # returns complete passes of satellite over many devices, windows missing in cache are calculated
+    # for all devices at once so satellite is propagated only once
+    # input: (satellite, [*[longitude, latitude]], skyfield Time start, skyfield Time end, minimum angle to trigger)
+    # output: *[*[rise Time, culminate Time, set below Time, *[azimut, elevation]]] one list per device
+    def get_passes_stations(self, satellite, devices, time_start, time_end, minimum_angle):
+        keys = [(satellite.tle, float(device[0]), float(device[1]), float(minimum_angle)) for device in devices]
+        # passes are searched without holding lock so many satellites can be searched in parallel,
+        # entries are copied and written back when search is done
+        with self.lock:
+            entries = [self.entries.get(key) for key in keys]
+            entries = [None if entry is None else dict(entry, passes=list(entry["passes"])) for entry in entries]
+        new = []
+        extended = []
+        for x, entry in enumerate(entries):
+            if entry is None or time_start.tt < entry["start"] or time_start.tt > entry["end"]:
+                entries[x] = {"start": time_start.tt, "end": time_end.tt, "passes": []}
+                new.append(x)
+            elif time_end.tt > entry["end"]:
+                extended.append(x)
+
+        if new:
+            passes = satellite.find_passes_stations([devices[x] for x in new], time_start, time_end, minimum_angle)
+            for x, device_passes in zip(new, passes):
+                entries[x]["passes"] = device_passes
+        if extended:
+            self.extend([entries[x] for x in extended], satellite, [devices[x] for x in extended],
+                        time_end, minimum_angle)
+
+        results = []
+        with self.lock:
+            for key, entry in zip(keys, entries):
+                # passes that already ended will never be requested again
+                entry["passes"] = [item for item in entry["passes"] if item[0].tt >= time_start.tt]
+                entry["start"] = time_start.tt
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                results.append([item for item in entry["passes"] if item[2].tt <= time_end.tt])
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return results
+
+    # calculates passes between end of cached windows and new end, all devices are searched together
+    # input: ([*cache entry], satellite, [*[longitude, latitude]], skyfield Time end, minimum angle to trigger)
+    # output: nothing
+    @staticmethod
+    def extend(entries, satellite, devices, time_end, minimum_angle):
+        margin = pass_margin(satellite)
+        search_start = time_end.ts.tt_jd(min(max(entry["start"], entry["end"] - margin) for entry in entries))
+        passes = satellite.find_passes_stations(devices, search_start, time_end, minimum_angle)
+        for entry, device_passes in zip(entries, passes):
+            last_rise = entry["passes"][-1][0].tt if entry["passes"] else max(entry["start"], entry["end"] - margin) - 1
+            entry["passes"] += [item for item in device_passes if item[0].tt > last_rise + SAME_EVENT]
+            entry["end"] = time_end.tt
+
+    # removes all cached passes
+    # input: nothing
+    # output: nothing
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# returns how far back from end of cached window passes are searched again when window slides forward
+# satellite sets at least once per orbit if it sets at all, so pass in progress at the end rose at most
+# one orbital period before it, long passes of high orbits (molniya, gto) are then found complete
+# input: satellite
+# output: days
+def pass_margin(satellite):
+    period = math.tau / satellite.satellite_object.model.no_kozai / 1440
+    return max(PASS_MARGIN, period * 1.05)
+
+
+default_cache = pass_cache()
+
+
+##########################################
+#              SCRIPT TEST               #
+##########################################
+# window of molniya orbit slides forward hour by hour, cached passes must be the same as passes of empty cache
+# run from project root: python -m scripts.satellite.pass_cache
+if __name__ == "__main__":
+    from scripts.satellite import satellite
+    from scripts.satellite import observer
+    from scripts.utils import read_tle
+
+    line1 = "1 40296U 14069A   21167.50000000  .00000000  00000-0  00000-0 0  999"
+    line2 = "2 40296  63.4000 120.0000 7200000 270.0000  20.0000  2.00600000 5000"
+    molniya = satellite.satellite(f'MOLNIYA\n{line1}{read_tle.checksum(line1)}\n{line2}{read_tle.checksum(line2)}')
+    device = observer.get_observer([18.56, 54.4])
+    start = satellite.ts.utc(2021, 6, 17)
+
+    sliding = pass_cache()
+    failed = 0
+    for hour in range(72):
+        time_start = start + hour / 24
+        time_end = time_start + 1
+        cached = [item[0].tt for item in sliding.get_passes(molniya, device, time_start, time_end, 0)]
+        fresh = [item[0].tt for item in pass_cache().get_passes(molniya, device, time_start, time_end, 0)]
+        # rise is refined on different grid, both are known only to PRECISION of pass finder
+        if len(cached) != len(fresh) or any(abs(a - b) * 86400 > 3 for a, b in zip(cached, fresh)):
+            failed += 1
+            print(f'window {hour}: cached {len(cached)} passes, searched {len(fresh)} passes')
+    print(f'{72 - failed}/72 windows match')
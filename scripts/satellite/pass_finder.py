@@ -0,0 +1,192 @@
+import numpy as np
+import math
+
+from scripts.satellite import ephemeris
+from scripts.satellite import footprint
+
+# events are refined until they are known to this many seconds, the same precision skyfield find_events has
+PRECISION = 1.0
+# number of positions in trajectory of every pass
+TRAJECTORY_POINTS = 50
+# spans that cannot contain pass are searched on grid this many times coarser than find_events step
+COARSE_STEPS = 4
+# polar radius of earth, the lowest ground under satellite gives the widest horizon (km)
+POLAR_RADIUS = footprint.EARTH_RADIUS * (1 - footprint.EARTH_FLATTENING)
+# degrees added to every geometric limit for difference between geodetic and geocentric angles
+MARGIN = 1.0
+
+
+# returns seconds between samples of first search, the same step skyfield find_events uses
+# input: skyfield EarthSatellite
+# output: seconds
+def search_step(satellite_object):
+    orbits_per_day = 24 * 60 * satellite_object.model.no_kozai / math.tau
+    return min(0.05 / max(orbits_per_day, 1.0), 0.25) * 86400
+
+
+# returns largest angle between device and point under satellite (seen from center of earth) at which satellite
+# can still be above minimum angle, it is computed for apogee which gives the widest horizon
+# input: (skyfield EarthSatellite, minimum angle to trigger)
+# output: angle in degrees
+def horizon_reach(satellite_object, minimum_angle):
+    model = satellite_object.model
+    apogee = (1 + model.alta) * model.radiusearthkm * 1.02  # apogee slowly changes during window
+    angle = math.radians(minimum_angle)
+    return math.degrees(math.acos(min(1.0, POLAR_RADIUS * math.cos(angle) / apogee)) - angle) + MARGIN
+
+
+# returns largest speed at which point under satellite moves over ground, at perigee and with rotation of earth
+# input: skyfield EarthSatellite
+# output: degrees per second
+def ground_speed(satellite_object):
+    model = satellite_object.model
+    eccentricity = model.ecco
+    perigee_rate = model.no_kozai / 60 * (1 + eccentricity) ** 2 / (1 - eccentricity ** 2) ** 1.5
+    return math.degrees(perigee_rate + ephemeris.EARTH_ROTATION) * 1.1
+
+
+# returns True when station is close enough to orbital plane that satellite can ever pass over it
+# input: (skyfield EarthSatellite, station position (3), horizon reach in degrees)
+# output: bool
+def can_reach(satellite_object, station, reach):
+    inclination = math.degrees(satellite_object.model.inclo)
+    highest_latitude = min(inclination, 180 - inclination) + MARGIN
+    station_latitude = math.degrees(math.asin(abs(station[2]) / math.sqrt(sum(item ** 2 for item in station))))
+    return station_latitude - highest_latitude <= reach
+
+
+# returns moments of find_events grid lying only in spans where satellite can be above minimum angle
+# for any station, satellite is first propagated on coarse grid and span is skipped when even with the
+# fastest ground speed point under satellite cannot get within horizon reach of station
+# input: (function seconds -> samples, station positions (stations, 3), horizon reach in degrees,
+#         step of find_events grid in seconds, length of window in seconds, ground speed in degrees per second)
+# output: sorted seconds from start of window
+def candidate_grid(sample, stations, reach, step, duration, speed):
+    coarse_step = step * COARSE_STEPS
+    coarse = np.append(np.arange(0, duration, coarse_step), duration)
+    positions = sample(coarse)[:, :3]
+    directions = positions / np.sqrt(np.sum(positions ** 2, axis=-1))[:, np.newaxis]
+    station_directions = stations / np.sqrt(np.sum(stations ** 2, axis=-1))[:, np.newaxis]
+    central = np.degrees(np.arccos(np.clip(station_directions @ directions.T, -1, 1)))
+
+    # between two samples central angle can fall at most by ground speed times time from nearer sample
+    lower = (central[:, :-1] + central[:, 1:] - speed * np.diff(coarse)) / 2
+    span = np.nonzero(np.any(lower <= reach, axis=0))[0]
+    fine = coarse[span, np.newaxis] + np.arange(COARSE_STEPS) * step
+    seconds = np.concatenate((fine.ravel(), coarse[span + 1]))
+    return np.unique(seconds[seconds <= duration])
+
+
+# returns elevation of satellite and direction of its change seen from stations, arrays are broadcast together
+# input: (itrs positions and velocities (..., 6), station positions (..., 3), zenith vectors of stations (..., 3))
+# output: (elevation in degrees, elevation rate in 1/s)
+def elevation(samples, stations, ups):
+    difference = samples[..., :3] - stations
+    velocity = samples[..., 3:]
+    distance = np.sqrt(np.sum(difference ** 2, axis=-1))
+    sine = np.sum(difference * ups, axis=-1) / distance
+    rate = (np.sum(velocity * ups, axis=-1) - sine * np.sum(difference * velocity, axis=-1) / distance) / distance
+    return np.degrees(np.arcsin(sine)), rate
+
+
+# searches moments where condition changes from True to False inside of intervals, all intervals at once
+# every step of bisection propagates satellite only once for all intervals of all stations
+# input: (function (seconds array, station index array) -> bool array, start seconds, end seconds, station indexes)
+# output: seconds of change
+def bisect(condition, start, end, station):
+    start = np.array(start, dtype=float)
+    end = np.array(end, dtype=float)
+    while len(start) and np.max(end - start) > PRECISION:
+        middle = (start + end) / 2
+        before = condition(middle, station)
+        start = np.where(before, middle, start)
+        end = np.where(before, end, middle)
+    return (start + end) / 2
+
+
+# returns complete passes of satellite over every station, satellite is propagated once for all stations
+# stations and time spans which satellite cannot reach are skipped, on the rest culminations are found first
+# and rise and set are searched around culminations that are high enough
+# input: (skyfield EarthSatellite, [*observer], skyfield Time start, skyfield Time end, minimum angle to trigger)
+# output: [*[*[rise Time, culminate Time, set below Time, *[azimut, elevation]]]] one list of passes per station
+def find_passes(satellite_object, devices, time_start, time_end, minimum_angle):
+    ts = time_start.ts
+    passes = [[] for _ in devices]
+    duration = (time_end - time_start) * 86400
+    reach = horizon_reach(satellite_object, minimum_angle)
+    # stations far away from orbital plane are dropped before anything is propagated
+    reachable = [x for x, device in enumerate(devices) if can_reach(satellite_object, device.station, reach)]
+    if not reachable or duration <= 0:
+        return passes
+    stations = np.array([devices[x].station for x in reachable])
+    ups = np.array([devices[x].up for x in reachable])
+
+    def times(seconds):
+        return ts.tt_jd(time_start.whole, time_start.tt_fraction + np.asarray(seconds) / 86400)
+
+    def sample(seconds):
+        return ephemeris.sample([satellite_object], times(seconds))[0]
+
+    def rising(seconds, station):
+        samples = sample(seconds)
+        return elevation(samples, stations[station], ups[station])[1] > 0
+
+    def below(seconds, station):
+        samples = sample(seconds)
+        return elevation(samples, stations[station], ups[station])[0] < minimum_angle
+
+    def above(seconds, station):
+        return ~below(seconds, station)
+
+    step = search_step(satellite_object)
+    seconds = candidate_grid(sample, stations, reach, step, duration, ground_speed(satellite_object))
+    if len(seconds) < 2:
+        return passes
+    grid_elevation, grid_rate = elevation(sample(seconds)[np.newaxis], stations[:, np.newaxis], ups[:, np.newaxis])
+
+    # culminations are between neighbouring samples where elevation stops growing, in skipped spans
+    # between candidate spans satellite is always below minimum angle
+    neighbours = np.diff(seconds) <= step * 1.001
+    station, index = np.nonzero((grid_rate[:, :-1] > 0) & (grid_rate[:, 1:] <= 0) & neighbours)
+    culminate = bisect(rising, seconds[index], seconds[index + 1], station)
+    culminate_elevation = elevation(sample(culminate), stations[station], ups[station])[0]
+    high = culminate_elevation >= minimum_angle
+    station, index, culminate = station[high], index[high], culminate[high]
+
+    # nearest samples below minimum angle before and after every culmination
+    grid_below = grid_elevation < minimum_angle
+    positions = np.arange(len(seconds))
+    last_below = np.maximum.accumulate(np.where(grid_below, positions, -1), axis=1)
+    next_below = np.flip(np.minimum.accumulate(np.flip(np.where(grid_below, positions, len(seconds)), axis=1),
+                                               axis=1), axis=1)
+    rise_index = last_below[station, index]
+    set_index = next_below[station, index + 1]
+    # pass already in progress at start or not finished at end is skipped
+    complete = (rise_index >= 0) & (set_index < len(seconds))
+    station, culminate = station[complete], culminate[complete]
+    rise_index, set_index = rise_index[complete], set_index[complete]
+
+    # satellite can culminate twice without setting, such pass is reported with its first culmination
+    first = np.ones(len(station), dtype=bool)
+    first[1:] = (station[1:] != station[:-1]) | (rise_index[1:] != rise_index[:-1])
+    station, culminate = station[first], culminate[first]
+    rise_index, set_index = rise_index[first], set_index[first]
+
+    rise = bisect(below, seconds[rise_index], np.minimum(seconds[np.minimum(rise_index + 1, len(seconds) - 1)],
+                                                          culminate), station)
+    set_below = bisect(above, np.maximum(seconds[np.maximum(set_index - 1, 0)], culminate), seconds[set_index],
+                       station)
+
+    # trajectories of all passes are propagated together
+    if len(station):
+        track = rise[:, np.newaxis] + (set_below - rise)[:, np.newaxis] * np.linspace(0, 1, TRAJECTORY_POINTS)
+        track_samples = sample(track.ravel()).reshape(len(station), TRAJECTORY_POINTS, 6)
+        for x in range(len(station)):
+            device = reachable[station[x]]
+            azimut, track_elevation, distance = ephemeris.look_angles(track_samples[x, :, :3], devices[device])
+            event_times = times([rise[x], culminate[x], set_below[x]])
+            passes[device].append([event_times[0], event_times[1], event_times[2],
+                                       np.column_stack((azimut, track_elevation)).tolist()])
+    for station_passes in passes:
+        station_passes.sort(key=lambda item: item[0].tt)
+    return passes
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import heapq
+import threading
+import time
+import os
+
+from scripts.utils import read_config
+
+
+# searches passes of one satellite, runs in worker thread
+# input: (satellite, [*[name of station, [longitude, latitude]]], time to start simulation, time to end simulation,
+#         minimum angle to trigger)
+# output: [*flyby_pass] sorted by rise
+def search(satellite_item, stations, time_start, time_end, minimum_angle):
+    return satellite_item.flyby_stations(stations, time_start, time_end, minimum_angle)
+
+
+# searches passes of many satellites at once, one task per satellite
+# threads are used instead of processes so all of them share pass cache and parsed tle,
+# sgp4 and numpy spend most of the search outside of python interpreter
+class pass_pool:
+    def __init__(self, workers=0, deadline=10):
+        # 0 means one worker per cpu core
+        self.workers = workers or os.cpu_count()
+        self.deadline = deadline  # seconds of waiting for results, 0 means no deadline
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pass')
+            return self.executor
+
+    # returns passes of all satellites over all stations sorted by rise time
+    # sorted lists of satellites are merged, satellites not finished before deadline are left out
+    # deadline bounds only response, searches not started yet are cancelled but running ones finish in their
+    # thread (cancel cannot stop them) and save passes to pass cache, so next request gets them right away
+    # input: ([*satellite], [*[name of station, [longitude, latitude]]], time to start simulation,
+    #         time to end simulation, minimum angle to trigger)
+    # output: [*flyby_pass]
+    def flyby(self, satellites, stations, time_start, time_end, minimum_angle):
+        started = time.time()
+        executor = self.get_executor()
+        futures = [executor.submit(search, item, stations, time_start, time_end, minimum_angle)
+                   for item in satellites]
+        done, not_done = wait(futures, timeout=self.deadline or None)
+
+        results = []
+        for item, future in zip(satellites, futures):
+            if future not in done:
+                # stops only searches still waiting in queue
+                future.cancel()
+                print(f'passes of "{item.satellite_object.name}" were not found before deadline')
+            elif future.exception() is not None:
+                print(f'searching passes of "{item.satellite_object.name}" failed: {future.exception()!r}')
+            else:
+                results.append(future.result())
+        print(f'passes of {len(results)}/{len(satellites)} satellites found in {time.time() - started:.3f}s')
+        return list(heapq.merge(*results, key=lambda item: item.rise))
+
+
+config = read_config.read_config()
+default_pool = pass_pool(config["pass_workers"], config["pass_deadline"])
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import threading
+
+from scripts.utils import read_tle
+from scripts.satellite import satellite
+
+
+# keeps parsed satellites of tle config for the whole process
+# tle file is parsed again only when its modification time and content changes
+# satellites are indexed by name, norad id and group of tle file
+class satellite_registry:
+    def __init__(self, path=read_tle.TLE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.digest = None
+        self.satellites = []
+        self.by_name = {}
+        self.by_norad = {}
+        self.by_group = {}
+
+    # returns list of satellite objects from tle config, reloads it when file was changed
+    # input: nothing
+    # output: [*satellite]
+    def get_satellites(self):
+        with self.lock:
+            self.reload()
+            return list(self.satellites)
+
+    # returns satellite object with given name or None
+    # input: name of satellite
+    # output: satellite
+    def get(self, name):
+        with self.lock:
+            self.reload()
+            return self.by_name.get(name)
+
+    # returns satellite object with given norad catalog number or None
+    # input: norad id
+    # output: satellite
+    def get_norad(self, norad):
+        with self.lock:
+            self.reload()
+            return self.by_norad.get(int(norad))
+
+    # returns names of all groups in tle config
+    # input: nothing
+    # output: [*group]
+    def get_groups(self):
+        with self.lock:
+            self.reload()
+            return list(self.by_group)
+
+    # returns satellites matching all given conditions, every satellite is returned only once
+    # order of names and norad ids is kept, satellites of group follow order of tle config
+    # input: (list of names, list of norad ids, group name, maximum number of results) every condition is optional
+    # output: [*satellite]
+    def query(self, names=None, norads=None, group=None, limit=None):
+        with self.lock:
+            self.reload()
+            if names is not None:
+                found = [self.by_name[name] for name in names if name in self.by_name]
+            elif norads is not None:
+                found = [self.by_norad[int(norad)] for norad in norads if int(norad) in self.by_norad]
+            elif group is not None:
+                found = list(self.by_group.get(group, []))
+            else:
+                found = list(self.satellites)
+
+            if norads is not None:
+                allowed = {int(norad) for norad in norads}
+                found = [item for item in found if item.satellite_object.model.satnum in allowed]
+            if group is not None:
+                allowed = {id(item) for item in self.by_group.get(group, [])}
+                found = [item for item in found if id(item) in allowed]
+
+            # same satellite can be asked for twice
+            found = list({id(item): item for item in found}.values())
+            return found[:limit]
+
+    # parses tle config again if it was changed since last load
+    # input: nothing
+    # output: True if satellites were reloaded
+    def reload(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self.mtime:
+            return False
+        digest = hashlib.sha1()
+        with open(self.path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        if digest == self.digest:
+            self.mtime = mtime
+            return False
+
+        # satellites with unchanged tle are kept, so only new elements are parsed
+        existing = {item.tle: item for item in self.satellites}
+        satellites = []
+        by_group = {}
+        with open(self.path, "r") as file:
+            for group, tle in read_tle.iter_tle(file, self.path):
+                item = existing.get(tle) or satellite.satellite(tle)
+                satellites.append(item)
+                by_group.setdefault(group, []).append(item)
+        self.satellites = satellites
+        self.by_name = {item.satellite_object.name: item for item in satellites}
+        self.by_norad = {item.satellite_object.model.satnum: item for item in satellites}
+        self.by_group = {group: items for group, items in by_group.items() if group is not None}
+        self.digest = digest
+        # modification time is saved only when file was parsed, after error file is read again on next call
+        self.mtime = mtime
+        print(f'loaded {len(self.satellites)} satellites from tle config')
+        return True
+
+
+default_registry = satellite_registry()
+
+
+# returns list of satellite objects from tle config shared by whole process
+# input: nothing
+# output: [*satellite]
+def get_satellites():
+    return default_registry.get_satellites()
+
+
+# returns satellite object with given name from tle config shared by whole process
+# input: name of satellite
+# output: satellite
+def get(name):
+    return default_registry.get(name)
+
+
+# returns satellite object with given norad id from tle config shared by whole process
+# input: norad id
+# output: satellite
+def get_norad(norad):
+    return default_registry.get_norad(norad)
+
+
+# returns satellites from tle config shared by whole process matching given conditions
+# input: like satellite_registry.query
+# output: [*satellite]
+def query(names=None, norads=None, group=None, limit=None):
+    return default_registry.query(names, norads, group, limit)
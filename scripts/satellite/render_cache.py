@@ -0,0 +1,96 @@
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+
+from scripts.utils import read_config
+
+config = read_config.read_config()
+# images encoded with other options are different images
+ENCODER = [config["image_format"], config["image_dpi"], config["png_compression"], config["webp_quality"]]
+
+
+# keeps encoded images in memory under key made of everything that changes picture
+# key of map contains render parameters, tle (elements and their epoch) and time bucket, so polls within
+# one bucket get the same image without drawing it again, least recently used images are removed
+class render_cache:
+    def __init__(self, bucket=10, max_entries=64):
+        self.bucket = bucket  # seconds, 0 means every render is new
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (bytes, mimetype)
+        self.latest = {}  # name of image -> key of its last version
+
+    # returns key of map
+    # input: (name of map, tle, [longitude, latitude] of device, render keyword arguments, unix time (now when not given))
+    # output: hex digest
+    def key(self, name, tle, current_position, options, now=None):
+        if now is None:
+            now = time.time()
+        bucket = int(now // self.bucket) if self.bucket > 0 else now
+        data = [name, tle, [float(item) for item in current_position], options, ENCODER, self.bucket, bucket]
+        return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+    # returns True when image of key is already rendered, it becomes most recently used
+    # input: key
+    # output: bool
+    def contains(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return False
+            self.entries.move_to_end(key)
+            return True
+
+    # returns encoded image
+    # input: key
+    # output: (bytes, mimetype) or None when image is not in cache
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    # saves encoded image
+    # input: (key, bytes, mimetype, name of image)
+    # output: nothing
+    def add(self, key, data, mimetype, name=None):
+        with self.lock:
+            self.entries[key] = (data, mimetype)
+            self.entries.move_to_end(key)
+            if name is not None:
+                self.latest[name] = key
+            self.evict()
+
+    # marks image already in cache as last version of name
+    # input: (key, name of image)
+    # output: nothing
+    def touch(self, key, name):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.latest[name] = key
+
+    # saves image under key made of its content, used for images that are not requested twice
+    # input: (bytes, mimetype, name of image)
+    # output: key
+    def store(self, data, mimetype, name=None):
+        key = hashlib.sha1(data).hexdigest()
+        self.add(key, data, mimetype, name)
+        return key
+
+    # returns key of last image saved with name
+    # input: name of image
+    # output: key or None
+    def get_latest(self, name):
+        with self.lock:
+            return self.latest.get(name)
+
+    # removes least recently used images when there is more than max_entries of them
+    def evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+default_cache = render_cache(bucket=config["render_bucket"], max_entries=config["render_cache_entries"])
@@ -0,0 +1,133 @@
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+from scripts.satellite import render_pool
+from scripts.satellite import render_cache
+
+
+# runs map renders in background and keeps their state under job id
+# identical requests submitted while first one is still running share one job, job is cancelled only
+# when every client that submitted it has stopped it
+class render_jobs:
+    def __init__(self, pool, max_finished=100):
+        self.pool = pool
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()
+        self.in_flight = {}
+        self.submitters = {}  # job id -> number of clients waiting for running job
+        self.condition = threading.Condition()
+
+    # starts drawing maps in background, every map gets key of render cache its image is served under
+    # input: [*[name of satellite, tle, [longitude, latitude] of device, satellite_map keyword arguments]]
+    # output: job id
+    def submit(self, maps):
+        images = {}
+        for name, tle, current_position, options in maps:
+            images[name] = render_cache.default_cache.key(name, tle, current_position, options)
+        maps = [[*item, images[item[0]]] for item in maps]
+        key = hashlib.sha1(json.dumps(sorted(images.values())).encode()).hexdigest()
+        with self.condition:
+            job_id = self.in_flight.get(key)
+            if job_id is not None:
+                self.submitters[job_id] += 1
+                return job_id
+
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {"id": job_id,
+                                 "status": "running",
+                                 "progress": {name: "queued" for name in images},
+                                 "images": images,
+                                 "created": time.time(),
+                                 "finished": None,
+                                 "version": 0,
+                                 }
+            self.in_flight[key] = job_id
+            self.submitters[job_id] = 1
+        threading.Thread(target=self.run, args=(job_id, key, maps), daemon=True).start()
+        return job_id
+
+    def run(self, job_id, key, maps):
+        def update(name, status):
+            with self.condition:
+                job = self.jobs[job_id]
+                job["progress"][name] = status
+                job["version"] += 1
+                self.condition.notify_all()
+
+        try:
+            results = self.pool.render(maps, callback=update, owner=job_id)
+            statuses = set(results.values())
+        except Exception as e:
+            print(f'drawing maps failed: {e!r}')
+            statuses = {"error"}
+
+        with self.condition:
+            job = self.jobs[job_id]
+            if "error" in statuses:
+                job["status"] = "error"
+            elif "cancelled" in statuses:
+                job["status"] = "cancelled"
+            else:
+                job["status"] = "done"
+            job["finished"] = time.time()
+            job["version"] += 1
+            # stopped job is not in flight anymore and the same request could have started new job
+            if self.in_flight.get(key) == job_id:
+                del self.in_flight[key]
+            self.submitters.pop(job_id, None)
+            self.evict()
+            self.condition.notify_all()
+
+    # removes oldest finished jobs when there is too many of them
+    def evict(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["finished"] is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    # returns state of job
+    # input: job id
+    # output: {'id','status','progress','images','created','finished','version'} or None when job is unknown
+    def get(self, job_id):
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job, progress=dict(job["progress"]), images=dict(job["images"]))
+        for name, status in job["progress"].items():
+            if status == "queued" and self.pool.is_drawing(name):
+                job["progress"][name] = "drawing"
+        return job
+
+    # waits until state of job changes
+    # input: (job id, version of job state already known to caller, maximum time to wait in seconds)
+    # output: state of job like in get
+    def wait(self, job_id, version, timeout=15):
+        with self.condition:
+            self.condition.wait_for(lambda: job_id not in self.jobs or self.jobs[job_id]["version"] != version,
+                                    timeout=timeout)
+        return self.get(job_id)
+
+    # stops job for one client that submitted it, maps still waiting for worker are cancelled only when
+    # no other client waits for the same job, so clients cannot stop maps of each other
+    # input: job id
+    # output: number of cancelled maps or None when job is unknown
+    def cancel(self, job_id):
+        with self.condition:
+            if job_id not in self.jobs:
+                return None
+            if job_id not in self.submitters:  # job is already finished
+                return 0
+            self.submitters[job_id] -= 1
+            if self.submitters[job_id] > 0:
+                return 0
+            # nobody waits for job, the same request submitted again starts new job instead of joining stopped one
+            for key in [key for key, value in self.in_flight.items() if value == job_id]:
+                del self.in_flight[key]
+        return self.pool.cancel(job_id)
+
+
+default_jobs = render_jobs(render_pool.default_pool)
@@ -0,0 +1,124 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+import os
+
+from scripts.utils import read_config
+from scripts.satellite import render_cache
+
+
+# draws map of one satellite in worker process and encodes it in memory
+# encoded image is sent back to server process, so nothing is written to disk and image is never half written
+# input: (name of satellite, tle, [longitude, latitude] of device, satellite_map keyword arguments)
+# output: (bytes, mimetype)
+def render_map(name, tle, current_position, options):
+    from scripts.satellite import satellite
+    from scripts.satellite import satellite_plot
+
+    image = satellite_plot.satellite_map(satellite.satellite(tle), current_position, **options)
+    return image.encode()
+
+
+# draws maps of many satellites at once, one map per worker process
+# maps already in render cache are not drawn again
+class render_pool:
+    def __init__(self, workers=0, cache=render_cache.default_cache):
+        # 0 means one worker per cpu core
+        self.workers = workers or os.cpu_count()
+        self.cache = cache
+        self.executor = None
+        self.lock = threading.Lock()
+        self.futures = {}
+        self.owned = {}  # owner (job id) -> futures of its maps, so one job can be cancelled without the others
+        self.progress = {}
+
+    # workers are not forked from server, fork copies locks held by other threads of server at that moment
+    # (live stream, observers, registry) and worker which takes such lock waits forever
+    def get_executor(self):
+        if self.executor is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(method))
+        return self.executor
+
+    # draws maps for all jobs and puts every image to render cache as soon as it is ready, blocks until all are finished
+    # input: ([*[name of satellite, tle, [longitude, latitude] of device, satellite_map keyword arguments,
+    #           key of render cache]], function called with (name, status) after every finished map,
+    #         owner of maps used by cancel)
+    # output: {name: 'done' | 'cancelled' | 'error'}
+    def render(self, jobs, callback=None, owner=None):
+        results = {}
+        with self.lock:
+            executor = self.get_executor()
+            futures = {}
+            keys = {}
+            for name, tle, current_position, options, key in jobs:
+                if self.cache.contains(key):
+                    self.cache.touch(key, name)
+                    self.progress[name] = results[name] = 'done'
+                    continue
+                self.progress[name] = 'queued'
+                future = executor.submit(render_map, name, tle, list(current_position), options)
+                futures[future] = name
+                keys[name] = key
+            self.futures.update(futures)
+            if owner is not None:
+                self.owned.setdefault(owner, set()).update(futures)
+
+        if callback is not None:
+            for name in results:
+                callback(name, 'done')
+        for future in as_completed(futures):
+            name = futures[future]
+            if future.cancelled():
+                status = 'cancelled'
+            elif future.exception() is not None:
+                status = 'error'
+                print(f'drawing map for "{name}" failed: {future.exception()!r}')
+                if isinstance(future.exception(), BrokenProcessPool):
+                    with self.lock:
+                        self.executor = None
+            else:
+                status = 'done'
+                self.cache.add(keys[name], *future.result(), name)
+                print(f'map for "{name}" was created and saved')
+            results[name] = status
+            with self.lock:
+                self.progress[name] = status
+                self.futures.pop(future, None)
+                self.owned.get(owner, set()).discard(future)
+            if callback is not None:
+                callback(name, status)
+        with self.lock:
+            if not self.owned.get(owner, True):
+                del self.owned[owner]
+        return results
+
+    # returns state of every satellite in current and last render
+    # input: nothing
+    # output: {name: 'queued' | 'drawing' | 'done' | 'cancelled' | 'error'}
+    def get_progress(self):
+        with self.lock:
+            progress = dict(self.progress)
+            for future, name in self.futures.items():
+                if future.running():
+                    progress[name] = 'drawing'
+            return progress
+
+    # returns True when map of satellite is being drawn by worker right now
+    # input: name of satellite
+    # output: bool
+    def is_drawing(self, name):
+        with self.lock:
+            return any(future.running() for future, item in self.futures.items() if item == name)
+
+    # cancels maps that are still waiting for worker, maps already being drawn are finished
+    # input: owner given to render (all maps when not given)
+    # output: number of cancelled maps
+    def cancel(self, owner=None):
+        with self.lock:
+            futures = list(self.futures) if owner is None else list(self.owned.get(owner, ()))
+            return sum(future.cancel() for future in futures)
+
+
+default_pool = render_pool(read_config.read_config()["render_workers"])
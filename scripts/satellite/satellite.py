@@ -6,156 +6,211 @@ import astropy.coordinates as coord
 from astropy.time import Time
 import astropy.units as u
 
-from timezonefinder import TimezoneFinder
-
 import numpy as np
 import math
 from scipy.spatial import ConvexHull, convex_hull_plot_2d
 
+from scripts.satellite import footprint
+from scripts.satellite import terminator
+from scripts.satellite import pass_cache
+from scripts.satellite import observer
+from scripts.satellite import ephemeris
+from scripts.satellite import pass_finder
+from scripts.satellite import flyby_pass
+from scripts.utils import read_config
+from scripts.utils import clock
+
 import datetime
 import pprint
 import pytz
 import time
 
+# one timescale shared by every satellite, loading it is expensive
+ts = load.timescale()
+
+# live positions are interpolated from orbit sampled every INTERPOLATION_STEP seconds (halved until error is
+# below INTERPOLATION_TOLERANCE km) for INTERPOLATION_HOURS, tolerance 0 means every position is exact sgp4
+config = read_config.read_config()
+INTERPOLATION_TOLERANCE = config["interpolation_tolerance"]
+INTERPOLATION_STEP = config["interpolation_step"]
+INTERPOLATION_HOURS = config["interpolation_hours"]
+INTERPOLATION_MARGIN = 1.25
+
+
+# returns datetime in utc, naive datetime is taken as local time of server
+# input: datetime
+# output: datetime with utc timezone
+def to_utc(when):
+    return when.astimezone(pytz.utc)
+
+
+# returns informations about satellite in dict of strings shown on pages and maps
+# input: (name, days from epoch, longitude, latitude, altitude, azimut, elevation, distance, is above horizon)
+# output: {'name','epoch','lon','lat','alt','azimut','elevation','distance','above'}
+def format_informations(name, days, lon, lat, alt, azimut, elevation, distance, above):
+    if days > 0:
+        satellite_epoch = '{:.3f} days away from epoch'.format(days)
+    else:
+        satellite_epoch = 'WARNING: {:.3f} days after epoch!'.format(days)
+
+    if above:
+        satellite_above = "satellite above horizon"
+    else:
+        satellite_above = "satellite below horizon"
+
+    return {"name": f'{name}',
+            "epoch": satellite_epoch,
+            "lon": f'lon: {round(lon, 2)}°',  # longitude(degress)
+            "lat": f'lat: {round(lat, 2)}°',  # latitude(degress)
+            "alt": f'alt: {round(alt, 0)}km',  # altitude(km)
+            "azimut": f'azimut: {round(azimut, 2)}°',  # azimut
+            "elevation": f'elevation: {round(elevation, 2)}°',  # elevation
+            "distance": f'distance: {round(distance, 2)}km',  # distance
+            "above": satellite_above,
+            }
+
 
 class satellite:
     # in order to create satellite class you must deliver "tle" to it
     def __init__(self, tle):
-        ts = load.timescale()
         tle_split = tle.splitlines()
         self.tle = tle
         self.satellite_object = EarthSatellite(tle_split[1], tle_split[2], name=tle_split[0], ts=ts)
+        self.interpolation = None
 
     # returns informations about satellite in dict
     # input: [longitude, latitude] of device
     # output: {'name','epoch','lon','lat','alt','azimut','elevation','distance','above'}
     def get_informations(self, current_position):
-        ts = load.timescale()
-        dt = datetime.datetime.now()
-        t = ts.utc(dt.year, dt.month, dt.day, dt.hour, dt.minute)
+        t = clock.skyfield_time(ts)
         days = t - self.satellite_object.epoch
-
-        satellite_name = f'{self.satellite_object.name}'
-        if days > 0:
-            satellite_epoch = '{:.3f} days away from epoch'.format(days)
-        else:
-            satellite_epoch = 'WARNING: {:.3f} days after epoch!'.format(days)
-
         geo = self.get_geo_position()
-        satellite_lon = f'lon: {round(geo[0], 2)}°'  # longitude(degress)
-        satellite_lat = f'lat: {round(geo[1], 2)}°'  # latitude(degress)
-        satellite_alt = f'alt: {round(geo[2], 0)}km'  # altitude(km)
-
         direction = self.azimut(current_position)
-        satellite_az = f'azimut: {round(direction[0], 2)}°'  # azimut
-        satellite_elev = f'elevation: {round(direction[1], 2)}°'  # elevation
-        satellite_dis = f'distance: {round(direction[2], 2)}km'  # distance
-        if direction[3]:  # above horizon
-            satellite_above = "satellite above horizon"
-        else:
-            satellite_above = "satellite below horizon"
-
-        return {"name": satellite_name,
-                "epoch": satellite_epoch,
-                "lon": satellite_lon,
-                "lat": satellite_lat,
-                "alt": satellite_alt,
-                "azimut": satellite_az,
-                "elevation": satellite_elev,
-                "distance": satellite_dis,
-                "above": satellite_above,
-                }
+        return format_informations(self.satellite_object.name, days, *geo, *direction)
 
     # returns informations about satellite position in float
     # input: nothing
     # output: [longitude, latitude, altitude]
     def get_geo_position(self):
-        ts = load.timescale()
-        t = ts.now()
-        tle_split = self.tle.splitlines()
-        self.satellite_object = EarthSatellite(tle_split[1], tle_split[2], name=tle_split[0], ts=ts)
+        if INTERPOLATION_TOLERANCE > 0:
+            lon, lat, alt = ephemeris.geodetic_point(self.interpolated_position())
+            return [lon, lat, int(alt)]
+        t = clock.skyfield_time(ts)
         geocentric = self.satellite_object.at(t)
         subpoint = wgs84.subpoint(geocentric)
         #                    longitude(degress)                  latitude(degress)                   altitude(km)
         position = [float(subpoint.longitude.degrees), float(subpoint.latitude.degrees), int(subpoint.elevation.km)]
         return position
 
+    # returns samples of orbit used to interpolate positions around given moment
+    # orbit is sampled again when moment is outside of them, step is halved until error in the middle of every
+    # step (where error of cubic hermite interpolation is the largest) is below tolerance
+    # input: unix time
+    # output: {'start','end','step','samples','error'} with times in unix seconds and error in km
+    def get_interpolation(self, when):
+        table = self.interpolation
+        if table is not None and table["start"] <= when <= table["end"]:
+            return table
+
+        start = math.floor(when / 60) * 60
+        start_time = ts.from_datetime(datetime.datetime.fromtimestamp(start, pytz.utc))
+        step = INTERPOLATION_STEP
+        while True:
+            seconds = np.arange(0, INTERPOLATION_HOURS * 3600 + step, step)
+            samples = ephemeris.sample([self.satellite_object],
+                                       ts.tt_jd(start_time.whole, start_time.tt_fraction + seconds / 86400))[0]
+            middle = seconds[:-1] + step / 2
+            exact = ephemeris.sample([self.satellite_object],
+                                     ts.tt_jd(start_time.whole, start_time.tt_fraction + middle / 86400))[0]
+            # 4th derivative of orbit changes a little inside of step, so error found in the middle gets margin
+            error = INTERPOLATION_MARGIN * float(np.max(np.linalg.norm(ephemeris.hermite(samples, step, middle) -
+                                                                       exact[:, :3], axis=1)))
+            # decayed satellite has no positions, there is nothing to refine
+            if error <= INTERPOLATION_TOLERANCE or step <= 1 or not math.isfinite(error):
+                break
+            step /= 2
+
+        table = {"start": start,
+                 "end": start + seconds[-1],
+                 "step": step,
+                 "samples": samples.tolist(),
+                 "error": error,
+                 }
+        self.interpolation = table
+        return table
+
+    # returns largest difference between interpolated and exact position around given moment
+    # input: unix time (now when not given)
+    # output: error in km
+    def interpolation_error(self, when=None):
+        if when is None:
+            when = clock.unix()
+        return self.get_interpolation(when)["error"]
+
+    # returns interpolated itrs position of satellite
+    # input: unix time (now when not given)
+    # output: (x, y, z) in km
+    def interpolated_position(self, when=None):
+        if when is None:
+            when = clock.unix()
+        table = self.get_interpolation(when)
+        seconds = when - table["start"]
+        index = min(int(seconds // table["step"]), len(table["samples"]) - 2)
+        return ephemeris.hermite_point(table["samples"][index], table["samples"][index + 1],
+                                       table["step"], seconds - index * table["step"])
+
     # returns informations about satellite pass near device location with given angle
+    # passes are served from pass cache, only missing part of time window is calculated
     # input: ([longitude, latitude], time to start simulation, time to end simulation, minimum angle to trigger)
-    # output: *[name, rise, culminate, set below]
+    # output: [*flyby_pass] sorted by rise
     def flyby(self, current_position, time_start, time_end, minimum_angle):
-        ts = load.timescale()
-        #                             lat y               lon x
-        geo_coords = wgs84.latlon(current_position[1], current_position[0])
-        tf = TimezoneFinder()
-        #                                lon x                    lat y
-        timezone = tf.timezone_at(lng=current_position[0], lat=current_position[1])
-        tz = pytz.timezone(timezone)
-        time_offset = datetime.datetime.now(tz).utcoffset().seconds / 3600
-
-        time_start_converted = ts.utc(time_start.year, time_start.month, time_start.day, time_start.hour, time_start.minute)
-        time_end_converted = ts.utc(time_end.year, time_end.month, time_end.day, time_start.hour, time_start.minute)
-
-        t, events = self.satellite_object.find_events(geo_coords, time_start_converted, time_end_converted,
-                                                      altitude_degrees=minimum_angle)
-        flyby_list = []
-        row = []
-        for ti, event in zip(t, events):
-            name = (f'rise above {minimum_angle}°', 'culminate', f'set below {minimum_angle}°')[event]
-            #                                  need to add timezone
-            corrected_ti = ti.utc_strftime(f'{int(ti.utc.hour + time_offset)}:%M:%S   %d-%b-%Y')
-            event_element = [self.satellite_object.name,corrected_ti, name]
-            row.append(event_element)
-            if event == 2:
-                flyby_list.append([row[0][0], row[0][1], row[1][1], row[2][1], self.trajectory_flyby(row[0][1], row[2][1], 50, current_position)])
-                row = []
-
-        # returned time is in LOCAL TIME not utc
-        return flyby_list
-
-    # returns informations about satellite trajectory at flyby event based on given parameters
-    # input: (time in seconds to plot line before satellite, time in seconds to plot after satellite, number of verticies in line   higher = more acurrate, [longitude, latitude] of device)
-    # output: [azimut, elevation]
-    def trajectory_flyby(self, time_before, time_after, resolution, current_position):
-        time_before = datetime.datetime.strptime(time_before, '%H:%M:%S   %d-%b-%Y')
-        time_before = abs(time_before - datetime.datetime.now())
-        time_after = datetime.datetime.strptime(time_after, '%H:%M:%S   %d-%b-%Y')
-        time_after = abs(time_after - datetime.datetime.now())
-
-        #print(f'{time_before}  {time_after}')
-        #print(f'{time_before.total_seconds()}  {time_after.total_seconds()}')
-
-        trajectory_list = []
-        ts = load.timescale()
-        tf = TimezoneFinder()
-        #                               lon x                        lat y
-        timezone = tf.timezone_at(lng=current_position[0], lat=current_position[1])
-        tz = pytz.timezone(timezone)
-        time_offset = datetime.datetime.now(tz).utcoffset().seconds / 3600
-        for x in range(resolution):
-            part = int((time_after.total_seconds() - time_before.total_seconds()) / resolution)
-            dt = datetime.datetime.now()
-            #                                     need to subtract time zone
-            t = ts.utc(dt.year, dt.month, dt.day, dt.hour - time_offset, dt.minute,
-                       dt.second + time_before.total_seconds() + (x * part))
-            geo_coords = wgs84.latlon(current_position[1], current_position[0])
-            difference = self.satellite_object - geo_coords
-            topocentric = difference.at(t)
-            alt, az, distance = topocentric.altaz()
-            #    aziumut(degrees)  elevation(degrees)
-            point_in_time = [az.degrees, alt.degrees]
-            trajectory_list.append(point_in_time)
-        return trajectory_list
+        return self.flyby_stations([["", current_position]], time_start, time_end, minimum_angle)
+
+    # returns informations about satellite passes over many ground stations with given angle
+    # passes of all stations missing in pass cache are calculated together
+    # input: ([*[name of station, [longitude, latitude]]], time to start simulation, time to end simulation, minimum angle to trigger)
+    # output: [*flyby_pass] sorted by rise, so lists of many satellites can be merged
+    def flyby_stations(self, stations, time_start, time_end, minimum_angle):
+        devices = [observer.get_observer(position) for name, position in stations]
+
+        # naive datetime is local time of server, window starts at whole minute so cached passes are reused
+        time_start_converted = ts.from_datetime(to_utc(time_start).replace(second=0, microsecond=0))
+        time_end_converted = ts.from_datetime(to_utc(time_end).replace(second=0, microsecond=0))
+
+        stations_passes = pass_cache.default_cache.get_passes_stations(self, devices, time_start_converted,
+                                                                       time_end_converted, minimum_angle)
+        passes = []
+        for (name, position), device, device_passes in zip(stations, devices, stations_passes):
+            for rise, culminate, set_below, trajectory_list in device_passes:
+                passes.append(flyby_pass.flyby_pass(self.satellite_object.name, name, flyby_pass.unix_time(rise),
+                                                    flyby_pass.unix_time(culminate), flyby_pass.unix_time(set_below),
+                                                    trajectory_list, device.tz))
+        passes.sort(key=lambda item: item.rise)
+        return passes
+
+    # returns complete passes of satellite near device location with given angle
+    # input: ([longitude, latitude], skyfield Time to start simulation, skyfield Time to end simulation, minimum angle to trigger)
+    # output: *[rise Time, culminate Time, set below Time, *[azimut, elevation]]
+    def find_passes(self, current_position, time_start, time_end, minimum_angle):
+        return self.find_passes_stations([current_position], time_start, time_end, minimum_angle)[0]
+
+    # returns complete passes of satellite over many devices, satellite is propagated once for all of them
+    # input: ([*[longitude, latitude]], skyfield Time to start simulation, skyfield Time to end simulation, minimum angle to trigger)
+    # output: *[*[rise Time, culminate Time, set below Time, *[azimut, elevation]]] one list per device
+    def find_passes_stations(self, positions, time_start, time_end, minimum_angle):
+        devices = [observer.get_observer(position) for position in positions]
+        return pass_finder.find_passes(self.satellite_object, devices, time_start, time_end, minimum_angle)
 
     # returns informations about satellite direction and elevation from device pov
     # input: [longitude, latitude] of device
     # output: [azimut, elevation, distance, above horizon bool]
     def azimut(self, current_position):
-        ts = load.timescale()
-        t = ts.now()
-        #                         lat y                     lon x
-        geo_coords = wgs84.latlon(current_position[1], current_position[0])
-        difference = self.satellite_object - geo_coords
+        if INTERPOLATION_TOLERANCE > 0:
+            device = observer.get_observer(current_position)
+            az, alt, distance = ephemeris.look_angles_point(self.interpolated_position(), device)
+            return [az, alt, int(distance), alt > 0]
+        t = clock.skyfield_time(ts)
+        difference = observer.get_observer(current_position).difference(self.satellite_object)
         topocentric = difference.at(t)
         alt, az, distance = topocentric.altaz()
         above_horizon = False
@@ -168,74 +223,45 @@ class satellite:
     # input: (time in seconds to plot line before satellite, time in seconds to plot after satellite, number of verticies in line   higher = more acurrate, [longitude, latitude] of device)
     # output: [longitude, latitude, azimut, elevation]
     def trajectory(self, time_before, time_after, resolution, current_position):
-        trajectory_list = []
-        ts = load.timescale()
-        tf = TimezoneFinder()
-        #                               lon x                        lat y
-        timezone = tf.timezone_at(lng=current_position[0], lat=current_position[1])
-        tz = pytz.timezone(timezone)
-        time_offset = datetime.datetime.now(tz).utcoffset().seconds / 3600
-        for x in range(resolution):
-            part = int((time_after + time_before) / resolution)
-            dt = datetime.datetime.now()
-            #                                     need to subtract time zone
-            t = ts.utc(dt.year, dt.month, dt.day, dt.hour - time_offset, dt.minute,
-                       dt.second - time_before + (x * part))
-            geocentric = self.satellite_object.at(t)
-            subpoint = wgs84.subpoint(geocentric)
-
-            geo_coords = wgs84.latlon(current_position[1], current_position[0])
-            difference = self.satellite_object - geo_coords
-            topocentric = difference.at(t)
-            alt, az, distance = topocentric.altaz()
-            #                     longitude(degress)                latitude(degress)       aziumut(degrees)  elevation(degrees)
-            point_in_time = [float(subpoint.longitude.degrees), float(subpoint.latitude.degrees), az.degrees,
-                             alt.degrees]
-            trajectory_list.append(point_in_time)
-        return trajectory_list
-
-    # WIP NEED MORE WORK WIP #
+        t = clock.skyfield_time(ts)
+        trajectory = self.trajectory_arrays(t - time_before / 86400, t + time_after / 86400,
+                                            resolution, current_position)
+        #                       longitude(degress)   latitude(degress)     aziumut(degrees)        elevation(degrees)
+        return np.column_stack((trajectory['lon'], trajectory['lat'], trajectory['azimut'], trajectory['elevation'])).tolist()
+
+    # returns informations about satellite trajectory between two moments computed in one propagation
+    # input: (skyfield Time of line start, skyfield Time of line end, number of verticies in line, [longitude, latitude] of device)
+    # output: {'time','lon','lat','azimut','elevation','distance'} with numpy arrays of length resolution
+    def trajectory_arrays(self, time_start, time_end, resolution, current_position):
+        t = time_start + (time_end - time_start) * np.linspace(0, 1, resolution)
+        geocentric = self.satellite_object.at(t)
+        subpoint = wgs84.subpoint(geocentric)
+
+        topocentric = geocentric - observer.get_observer(current_position).topos.at(t)
+        alt, az, distance = topocentric.altaz()
+        return {"time": t,
+                "lon": subpoint.longitude.degrees,  # longitude(degress)
+                "lat": subpoint.latitude.degrees,  # latitude(degress)
+                "azimut": az.degrees,  # aziumut(degrees)
+                "elevation": alt.degrees,  # elevation(degrees)
+                "distance": distance.km,  # distance(km)
+                }
+
     # returns points where is night on earth
-    # input: resolution in float (minimum:0.1 optimal:0.2 ultra:1)
+    # input: (resolution in float (minimum:0.1 optimal:0.2 ultra:1), astropy Time of render (now when not given))
     # output: [*[x,y]]
     @staticmethod
-    def sun_visible_zone(resolution):
-        zone = []
-        for y in range(int(180 * resolution)):
-            for x in range(int(360 * resolution)):
-                loc = coord.EarthLocation(lon=(x / resolution - 180) * u.deg,
-                                          lat=(y / resolution - 90) * u.deg)
-                now = Time.now()
-                altaz = coord.AltAz(location=loc, obstime=now)
-                sun = coord.get_sun(now)
-                if sun.transform_to(altaz).alt < 0:
-                    zone.append([x / resolution - 180, y / resolution - 90])
-        return zone
+    def sun_visible_zone(resolution, now=None):
+        if now is None:
+            now = clock.astropy_time()
+        return terminator.night_zone(resolution, now)
 
     # returns polygon of area visible from satellite
     # input: resolution in float (minimum:0.1 optimal:0.2 ultra:1)
     # output: [*[x,y]]
     def satellite_visible_zone(self, resolution):
-        zone = []
-        ts = load.timescale()
-        t = ts.now()
-        for y in range(int(180 * resolution)):
-            for x in range(int(360 * resolution)):
-                #                              lat y            lon x
-                geo_coords = wgs84.latlon(y / resolution - 90, x / resolution - 180)
-                difference = self.satellite_object - geo_coords
-                topocentric = difference.at(t)
-                alt, az, distance = topocentric.altaz()
-                if alt.degrees > 0:
-                    zone.append([x / resolution - 180, y / resolution - 90])
-        points = np.array(zone)
-        hull = ConvexHull(points)
-        converted = [
-            [points[hull.vertices[x], 0], points[hull.vertices[x], 1]]
-            for x in range(len(hull.vertices))
-        ]
-        converted.append([points[hull.vertices[0], 0], points[hull.vertices[0], 1]])
-        return converted
+        t = clock.skyfield_time(ts)
+        return footprint.visible_zone(self.satellite_object, t, resolution)
 
 
 ##########################################
@@ -283,7 +309,7 @@ if __name__ == "__main__":
     #####################################################
     #  using all that gathered data to plot it on map   #
     #####################################################
-    import satellite_plot
+    from scripts.satellite import satellite_plot
     from pathlib import Path
     from PIL import Image
 
@@ -1,53 +1,128 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.ticker import EngFormatter, StrMethodFormatter
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 from matplotlib import gridspec, ticker
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+import matplotlib.image as mpimg
+from PIL import Image
+import io
 import math
 import numpy as np
 from scipy.spatial import ConvexHull, convex_hull_plot_2d
+import threading
 import time
 import os
 from pathlib import Path
 
-
-def satellite_map(satellite,
-                  current_position,
-                  satellite_resolution=0.1,
-                  sun_resolution=0.1,
-                  path_resolution=100,
-                  before_time=0,
-                  after_time=3600,
-                  draw_sat_area=False,
-                  draw_sun_area=False):
-    satellite_info = satellite.get_informations(current_position)
-    pos = satellite.get_geo_position()
-    current_direction = satellite.azimut(current_position)
-    trajectory = satellite.trajectory(before_time, after_time, path_resolution, current_position)
-
-    if draw_sat_area:
-        satellite_zone = satellite.satellite_visible_zone(satellite_resolution)
-    if draw_sun_area:
-        sun_zone = satellite.sun_visible_zone(sun_resolution)
-
-    ROOT_DIR = str(Path(__file__).parent.parent.parent.as_posix())  # This is your Project Root
-    img = plt.imread(ROOT_DIR + "/static/images/earth2.jpg")
-    fig = plt.figure()
+from scripts.satellite import terminator
+from scripts.utils import read_config
+
+ROOT_DIR = str(Path(__file__).parent.parent.parent.as_posix())  # This is your Project Root
+EARTH_IMAGE = ROOT_DIR + "/static/images/earth2.jpg"
+SATELLITE_IMAGE = ROOT_DIR + '/static/images/satellite.png'
+
+# rendered figures are encoded in memory with these options
+config = read_config.read_config()
+IMAGE_FORMAT = config["image_format"]  # 'png' | 'webp'
+IMAGE_DPI = config["image_dpi"]
+PNG_COMPRESSION = config["png_compression"]  # 0 (fastest) - 9 (smallest)
+WEBP_QUALITY = config["webp_quality"]  # 0 - 100, 100 is lossless
+IMAGE_TYPES = {'png': 'image/png', 'webp': 'image/webp'}
+
+images = {}
+templates = {}
+templates_lock = threading.Lock()
+
+
+# returns image from disk, every image is read only once
+# input: path of image
+# output: numpy array
+def load_image(path):
+    if path not in images:
+        images[path] = mpimg.imread(path)
+    return images[path]
+
+
+# pixels of rendered figure
+class rendered_image:
+    def __init__(self, pixels, dpi):
+        self.pixels = pixels
+        self.dpi = dpi
+
+    # saves image to file
+    # input: (path of file, image format (taken from file extension when not given))
+    # output: nothing
+    def savefig(self, fname, format=None):
+        mpimg.imsave(fname, self.pixels, format=format, dpi=self.dpi)
+
+    # returns image encoded in memory, nothing is written to disk
+    # input: image format 'png' | 'webp' (IMAGE_FORMAT when not given)
+    # output: (bytes, mimetype)
+    def encode(self, image_format=None):
+        image_format = image_format or IMAGE_FORMAT
+        buffer = io.BytesIO()
+        image = Image.fromarray(self.pixels)
+        if image_format == 'webp':
+            image.save(buffer, format='WEBP', quality=WEBP_QUALITY, lossless=WEBP_QUALITY >= 100)
+        else:
+            image.save(buffer, format='PNG', compress_level=PNG_COMPRESSION, dpi=(self.dpi, self.dpi))
+        return buffer.getvalue(), IMAGE_TYPES[image_format]
+
+
+# figure with static background (images, grid, ticks, frames) drawn only once
+# every render restores cached background and draws only artists added since template was built
+# use it with "with" statement, artists added inside are removed when block ends
+class figure_template:
+    def __init__(self, build, size):
+        self.figure = Figure(figsize=size, dpi=IMAGE_DPI)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = build(self.figure)
+        for ax in self.axes:
+            # dynamic artists must not move limits away from cached background
+            ax.set_autoscale_on(False)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.static = {ax: set(ax.get_children()) for ax in self.axes}
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        self.lock.acquire()
+        return self.axes
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for artist in self.dynamic_artists():
+            artist.remove()
+        self.lock.release()
+
+    def dynamic_artists(self):
+        return [artist for ax in self.axes for artist in ax.get_children() if artist not in self.static[ax]]
+
+    # draws dynamic artists over cached background
+    # input: nothing
+    # output: rendered_image
+    def render(self):
+        self.canvas.restore_region(self.background)
+        for artist in sorted(self.dynamic_artists(), key=lambda item: item.get_zorder()):
+            artist.axes.draw_artist(artist)
+        return rendered_image(np.asarray(self.canvas.buffer_rgba()).copy(), self.figure.dpi)
+
+
+# builds static part of satellite map: earth image with grid, radar frame and space for text
+# input: figure
+# output: [map axes, radar axes, text axes]
+def build_map(fig):
     gs = gridspec.GridSpec(ncols=2, nrows=2, width_ratios=[5, 1],
-                           height_ratios=[1, 1])
-    # fig, (ax1, ax2) = plt.subplots(1, 2, gridspec_kw={'width_ratios': [4, 1]})
-    ax1 = plt.subplot(gs[0:, 0])
-    ax2 = plt.subplot(gs[0, 1:], projection='polar')
-    ax3 = plt.subplot(gs[1:, 1:])
-    fig.tight_layout()
-    fig.canvas.set_window_title(satellite_info['name'])
-    plt.tight_layout()
-    fig.tight_layout()
-    plt.subplots_adjust(left=0.05, bottom=0, right=0.95, top=0.99, wspace=0.1, hspace=0.05)
-    plt.gcf().set_size_inches(10, 5)
+                           height_ratios=[1, 1], figure=fig)
+    ax1 = fig.add_subplot(gs[0:, 0])
+    ax2 = fig.add_subplot(gs[0, 1:], projection='polar')
+    ax3 = fig.add_subplot(gs[1:, 1:])
+    fig.subplots_adjust(left=0.05, bottom=0, right=0.95, top=0.99, wspace=0.1, hspace=0.05)
     ax1.margins(0)
-    plt.xlim([-180, 180])  # limiting degrees of lon to -180,180
-    plt.ylim([-90, 90])  # limiting degrees of lat to -90,90
-    ax1.imshow(img, extent=[-180, 180, -90, 90])  # resizing background image to fit box
+    ax1.imshow(load_image(EARTH_IMAGE), extent=[-180, 180, -90, 90])  # resizing background image to fit box
+    ax1.set_xlim([-180, 180])  # limiting degrees of lon to -180,180
+    ax1.set_ylim([-90, 90])  # limiting degrees of lat to -90,90
     ax1.set_xticks([-180, -150, -120, -90, -60, -30, 0, 30, 60, 90, 120, 150, 180])  # visible lon ticks
     ax1.set_yticks([-90, -75, -60, -45, -30, -15, 0, 15, 30, 45, 60, 75, 90])  # visible lat ticks
     ax1.yaxis.set_major_formatter(StrMethodFormatter(u"{x:.0f}°"))
@@ -61,284 +136,229 @@ def satellite_map(satellite,
     #
     # # # # # # # # # # # # # # # # # #  lon
 
-    # device             lon (x)             lat(y)
-    ax1.plot(current_position[0], current_position[1], marker=".", markersize=20, c='r')
-
-    # sat              lon (x)             lat(y)
-    path = ROOT_DIR + '/static/images/satellite.png'
-    ab = AnnotationBbox(OffsetImage(plt.imread(path), 0.15),
-                        (pos[0], pos[1],), frameon=False)
-    ax1.add_artist(ab)
-
-    ax1.plot()
-
-    x_trajectory = [trajectory[item][0] for item in range(len(trajectory))]
-    y_trajectory = [trajectory[item][1] for item in range(len(trajectory))]
-
-    x_lines_list = []
-    y_lines_list = []
-
-    last_cut = 0
-    count = sum(
-        x_trajectory[x] < 0 and x_trajectory[x + 1] > 0
-        for x in range(len(trajectory) - 1)
-    )
-
-    opacity_level = 1 / (count + 1)
-
-    last_cut = 0
-    for x in range(len(trajectory) - 1):
-        if x_trajectory[x] < 0 and x_trajectory[x + 1] > 0:
-            x_copy = x_trajectory
-            y_copy = y_trajectory
-
-            x_lines_list.append(x_copy[last_cut:x + 1])
-            y_lines_list.append(y_copy[last_cut:x + 1])
-            last_cut = x + 1
-
-    x_lines_list.append(x_trajectory[last_cut + 1:])
-    y_lines_list.append(y_trajectory[last_cut + 1:])
-
-    if x_lines_list:
-        width = 0.0000002
-        for item in range(len(x_lines_list)):
-            if len(x_lines_list[item]) > 2:
-                if x_lines_list[item][0] != 180 and item != 0:
-                    x_lines_list[item].insert(0, 180)
-                    y_lines_list[item].insert(0, y_lines_list[item][0])
-
-                if x_lines_list[item][-1] != -180 and item != len(x_lines_list) - 1:
-                    x_lines_list[item].append(-180)
-                    y_lines_list[item].append(y_lines_list[item][-1])
-
-            ax1.plot(x_lines_list[item], y_lines_list[item], c='r', alpha=1 - (item * opacity_level))
-
-            for inside_item in range(len(x_lines_list[item]) - 1):
-                u = -(x_lines_list[item][inside_item] - x_lines_list[item][inside_item + 1])
-                v = -(y_lines_list[item][inside_item] - y_lines_list[item][inside_item + 1])
-                length = np.sqrt(u ** 2 + v ** 2)
-                hal = hl = 1. / width * length
-                ax1.quiver(x_lines_list[item][inside_item], y_lines_list[item][inside_item], u, v, angles='xy',
-                           scale_units='xy', scale=1,
-                           headwidth=hl,
-                           headaxislength=hal,
-                           headlength=hl,
-                           width=width,
-                           color="r",
-                           alpha=1 - (item * opacity_level)
-                           )
-    else:
-        ax1.plot(x_trajectory, y_trajectory, c='r')
-
-        width = 0.0000013
-        for inside_item in range(len(x_trajectory) - 1):
-            u = -(x_trajectory[inside_item] - x_trajectory[inside_item + 1])
-            v = -(y_trajectory[inside_item] - y_trajectory[inside_item + 1])
-            length = np.sqrt(u ** 2 + v ** 2)
-            hal = hl = 1. / width * length
-            ax1.quiver(x_trajectory[inside_item], y_trajectory[inside_item], u, v, angles='xy', scale_units='xy',
-                       scale=1,
-                       headwidth=hl,
-                       headaxislength=hal,
-                       headlength=hl,
-                       width=width,
-                       color="r")
-
-    if draw_sun_area:
-        x_sun_zone = [sun_zone[item][0] for item in range(len(sun_zone))]
-        y_sun_zone = [sun_zone[item][1] for item in range(len(sun_zone))]
-        for x in range(len(x_sun_zone)):
-            ax1.plot(x_sun_zone[x], y_sun_zone[x], marker=".", markersize=3 / sun_resolution, c='black', alpha=0.2)
+    build_radar_frame(ax2)
 
-    if draw_sat_area:
-        x_zone = [satellite_zone[item][0] for item in range(len(satellite_zone))]
-        y_zone = [satellite_zone[item][1] for item in range(len(satellite_zone))]
-        ax1.plot(x_zone, y_zone, c='b')
-        xs, ys = zip(*satellite_zone)
-        ax1.fill(xs, ys, color='b', alpha=0.3)
+    ax3.axis('off')
+    ax3.set_xlim([-180, 180])
+    ax3.set_ylim([-90, 90])
+    return [ax1, ax2, ax3]
 
-    ######################################################
-    ######################################################
-    ######################################################
 
-    ax2.set_thetamin(0)
-    ax2.set_thetamax(360)
-    ax2.set_theta_zero_location("N")
+# builds static part of flyby radar
+# input: figure
+# output: [radar axes]
+def build_radar(fig):
+    ax1 = fig.add_subplot(projection='polar')
+    fig.subplots_adjust(left=0.05, bottom=0.05, right=0.95, top=0.95, wspace=0.1, hspace=0.05)
+    build_radar_frame(ax1)
+    return [ax1]
 
-    ax2.set_theta_direction(-1)
 
-    ax2.set_xticklabels(['N', 'NW', 'W', 'SW', 'S', 'SE', 'E', 'NE'])
+# sets polar axes to show azimut (north on top, clockwise) and elevation (90° in the middle)
+def build_radar_frame(ax):
+    ax.set_thetamin(0)
+    ax.set_thetamax(360)
+    ax.set_theta_zero_location("N")
 
-    ax2.tick_params(axis='both', which='major', labelsize=10)
-    ax2.tick_params(axis='both', which='minor', labelsize=8)
+    ax.set_theta_direction(-1)
 
-    ax2.set_rlim(90, 0, 1)
-    ax2.set_yticks(np.arange(0, 91, 15))
-    ax2.set_yticklabels(ax2.get_yticks()[::-1])
-    ax2.invert_yaxis()
+    ax.set_xticks(np.radians(np.arange(0, 360, 45)))
+    ax.set_xticklabels(['N', 'NW', 'W', 'SW', 'S', 'SE', 'E', 'NE'])
 
-    if current_direction[1] < 0:
-        actual_elev = 90
-    else:
-        actual_elev = 90 - current_direction[1]
+    ax.tick_params(axis='both', which='major', labelsize=10)
+    ax.tick_params(axis='both', which='minor', labelsize=8)
 
-    ax2.plot(math.radians(current_direction[0]), actual_elev, marker=".", markersize=10, c='r')
-    path = ROOT_DIR + '/static/images/satellite.png'
-    ab = AnnotationBbox(OffsetImage(plt.imread(path), 0.10),
-                        (math.radians(current_direction[0]), actual_elev), frameon=False)
-    ax2.add_artist(ab)
+    ax.set_rlim(90, 0, 1)
+    ax.set_yticks(np.arange(0, 91, 15))
+    ax.set_yticklabels(ax.get_yticks()[::-1])
+    ax.invert_yaxis()
 
-    x_direction = [trajectory[item][2] for item in range(len(trajectory))]
-    y_direction = [trajectory[item][3] for item in range(len(trajectory))]
 
-    x_lines_list = []
-    y_lines_list = []
+# returns template of figure, templates are built once per kind and size
+# input: (kind of figure 'map' | 'radar', size of figure in inches)
+# output: figure_template
+def get_template(kind, size=(10, 5)):
+    key = (kind, tuple(size))
+    with templates_lock:
+        if key not in templates:
+            build = {'map': build_map, 'radar': build_radar}[kind]
+            templates[key] = figure_template(build, size)
+        return templates[key]
 
-    for item in range(len(x_direction)):
-        x_direction[item] = math.radians(x_direction[item])
 
-    for item in reversed(range(len(y_direction))):
-        if y_direction[item] < 0:
-            pass
-            # y_direction.pop(item)
-            # x_direction.pop(item)
-            # y_direction[item] = 90
+def satellite_map(satellite,
+                  current_position,
+                  satellite_resolution=0.1,
+                  sun_resolution=0.1,
+                  path_resolution=100,
+                  before_time=0,
+                  after_time=3600,
+                  draw_sat_area=False,
+                  draw_sun_area=False,
+                  size=(10, 5)):
+    satellite_info = satellite.get_informations(current_position)
+    pos = satellite.get_geo_position()
+    current_direction = satellite.azimut(current_position)
+    trajectory = satellite.trajectory(before_time, after_time, path_resolution, current_position)
 
-        else:
-            y_direction[item] = 90 - y_direction[item]
-
-    last_cut = 0
-    for x in range(len(x_direction) - 1):
-        if x_direction[x] < 0:
-            x_copy = x_direction
-            y_copy = y_direction
-
-            x_lines_list.append(x_copy[last_cut:x + 1])
-            y_lines_list.append(y_copy[last_cut:x + 1])
-            last_cut = x + 1
-
-    x_lines_list.append(x_direction[last_cut + 1:])
-    y_lines_list.append(y_direction[last_cut + 1:])
-
-    count = len(x_lines_list)
-
-    opacity_level = 1 / (count + 1)
-
-    if x_lines_list:
-        width = 0.0000008
-        for item in range(len(x_lines_list)):
-            if len(x_lines_list[item]) > 2:
-                if y_lines_list[item][0] != 90:
-                    y_lines_list[item].insert(0, 90)
-                    x_lines_list[item].insert(0, x_lines_list[item][0])
-
-                if x_lines_list[item][-1] != 0 and item != len(x_lines_list) - 1:
-                    y_lines_list[item].append(90)
-                    x_lines_list[item].append(x_lines_list[item][-1])
-
-            ax2.plot(x_lines_list[item], y_lines_list[item], c='r', alpha=1 - (item * opacity_level))
-
-            for inside_item in range(len(x_lines_list[item]) - 1):
-                u = -(x_lines_list[item][inside_item] - x_lines_list[item][inside_item + 1])
-                v = -(y_lines_list[item][inside_item] - y_lines_list[item][inside_item + 1])
-                length = np.sqrt(u ** 2 + v ** 2)
-                hal = hl = 1. / width * length
-                ax2.quiver(x_lines_list[item][inside_item], y_lines_list[item][inside_item], u, v, angles='xy',
-                           scale_units='xy', scale=1,
-                           headwidth=hl,
-                           headaxislength=hal,
-                           headlength=hl,
-                           width=width,
-                           color="r",
-                           alpha=1 - (item * opacity_level)
-                           )
-    else:
-        ax2.plot(x_direction, y_direction, c='r')
-
-        width = 0.0000008
-        for inside_item in range(len(x_direction) - 1):
-            u = -(x_direction[inside_item] - x_direction[inside_item + 1])
-            v = -(y_direction[inside_item] - y_direction[inside_item + 1])
-            length = np.sqrt(u ** 2 + v ** 2)
-            hal = hl = 1. / width * length
-            ax2.quiver(x_direction[inside_item], y_direction[inside_item], u, v, angles='xy', scale_units='xy',
-                       scale=1,
-                       headwidth=hl,
-                       headaxislength=hal,
-
-                       headlength=hl,
-                       width=width,
-                       color="r")
+    if draw_sat_area:
+        satellite_zone = satellite.satellite_visible_zone(satellite_resolution)
+    if draw_sun_area:
+        sun_zone = terminator.cached_night_mask(sun_resolution)[2]
 
-    ax3.axis('off')
-    constant_x = -230
-    constant_y = 90
-    font = "monospace"
-    font_size = 9
-    ax3.text(constant_x, constant_y, satellite_info['name'], fontsize=font_size, family=font)
-    ax3.text(constant_x, constant_y - 15, satellite_info['lon'], fontsize=font_size, family=font)
-    ax3.text(constant_x, constant_y - 30, satellite_info['lat'], fontsize=font_size, family=font)
-    ax3.text(constant_x, constant_y - 45, satellite_info['alt'], fontsize=font_size, family=font)
-    ax3.text(constant_x, constant_y - 60, satellite_info['azimut'], fontsize=font_size, family=font)
-    ax3.text(constant_x, constant_y - 75, satellite_info['elevation'], fontsize=font_size, family=font)
-    ax3.text(constant_x, constant_y - 90, satellite_info['distance'], fontsize=font_size, family=font)
-    ax3.text(constant_x, constant_y - 105, satellite_info['above'], fontsize=font_size, family=font)
-    ax3.text(constant_x, constant_y - 120, satellite_info['epoch'], fontsize=font_size, family=font)
-    return plt
-
-
-def satellite_radar(sats_data, sats_pos):
-    from pprint import pprint
-
-    ROOT_DIR = str(Path(__file__).parent.parent.parent.as_posix())  # This is your Project Root
-    fig = plt.figure()
-    ax1 = plt.subplot(projection='polar')
-    fig.tight_layout()
-    fig.canvas.set_window_title("radar")
-    plt.tight_layout()
-    fig.tight_layout()
-    plt.subplots_adjust(left=0.05, bottom=0.05, right=0.95, top=0.95, wspace=0.1, hspace=0.05)
-    plt.gcf().set_size_inches(10, 5)
-
-
-    ax1.set_thetamin(0)
-    ax1.set_thetamax(360)
-    ax1.set_theta_zero_location("N")
-
-    ax1.set_theta_direction(-1)
-
-    ax1.set_xticklabels(['N', 'NW', 'W', 'SW', 'S', 'SE', 'E', 'NE'])
-
-    ax1.tick_params(axis='both', which='major', labelsize=10)
-    ax1.tick_params(axis='both', which='minor', labelsize=8)
-
-    ax1.set_rlim(90, 0, 1)
-    ax1.set_yticks(np.arange(0, 91, 15))
-    ax1.set_yticklabels(ax1.get_yticks()[::-1])
-    ax1.invert_yaxis()
-
-    plt.show()
-
-    for sat in sats_pos:
-        if sat[1][1] < 0:
-            sat[1][1] = 90
-        else:
-            sat[1][1] = 90 - sat[1][1]
+    template = get_template('map', size)
+    with template as (ax1, ax2, ax3):
+        # device             lon (x)             lat(y)
+        ax1.plot(current_position[0], current_position[1], marker=".", markersize=20, c='r')
 
-        ax1.plot(math.radians(float(sat[1][0])), sat[1][1], marker=".", markersize=10, c='r')
-        path = ROOT_DIR + '/static/images/satellite.png'
-        ab = AnnotationBbox(OffsetImage(plt.imread(path), 0.10),
-                            (math.radians(float(sat[1][0])), sat[1][1]), frameon=False)
+        # sat              lon (x)             lat(y)
+        ab = AnnotationBbox(OffsetImage(load_image(SATELLITE_IMAGE), zoom=0.15),
+                            (pos[0], pos[1],), frameon=False)
         ax1.add_artist(ab)
 
-    for raw_path in sats_data:
-        path = raw_path[4]
-        x = []
-        y = []
-        print(path)
-        for point in path:
-            x.append(math.radians(point[0]))
-            y.append(90-point[1])
-        ax1.plot(x, y, c='r', alpha=1)
-
-    return plt
+        draw_map_track(ax1, trajectory)
+
+        if draw_sun_area:
+            # whole night side is one semi transparent black image, mask is sampled at centres of grid cells
+            # so every pixel of image is drawn around its sample and image covers whole map
+            night = np.zeros(sun_zone.shape + (4,))
+            night[:, :, 3] = sun_zone * 0.35
+            ax1.imshow(night, extent=[-180, 180, -90, 90], origin='lower', interpolation='nearest')
+
+        if draw_sat_area:
+            x_zone = [satellite_zone[item][0] for item in range(len(satellite_zone))]
+            y_zone = [satellite_zone[item][1] for item in range(len(satellite_zone))]
+            ax1.plot(x_zone, y_zone, c='b')
+            xs, ys = zip(*satellite_zone)
+            ax1.fill(xs, ys, color='b', alpha=0.3)
+
+        if current_direction[1] < 0:
+            actual_elev = 90
+        else:
+            actual_elev = 90 - current_direction[1]
+
+        ax2.plot(math.radians(current_direction[0]), actual_elev, marker=".", markersize=10, c='r')
+        ab = AnnotationBbox(OffsetImage(load_image(SATELLITE_IMAGE), zoom=0.10),
+                            (math.radians(current_direction[0]), actual_elev), frameon=False)
+        ax2.add_artist(ab)
+
+        draw_radar_track(ax2, trajectory)
+
+        constant_x = -230
+        constant_y = 90
+        font = "monospace"
+        font_size = 9
+        ax3.text(constant_x, constant_y, satellite_info['name'], fontsize=font_size, family=font)
+        ax3.text(constant_x, constant_y - 15, satellite_info['lon'], fontsize=font_size, family=font)
+        ax3.text(constant_x, constant_y - 30, satellite_info['lat'], fontsize=font_size, family=font)
+        ax3.text(constant_x, constant_y - 45, satellite_info['alt'], fontsize=font_size, family=font)
+        ax3.text(constant_x, constant_y - 60, satellite_info['azimut'], fontsize=font_size, family=font)
+        ax3.text(constant_x, constant_y - 75, satellite_info['elevation'], fontsize=font_size, family=font)
+        ax3.text(constant_x, constant_y - 90, satellite_info['distance'], fontsize=font_size, family=font)
+        ax3.text(constant_x, constant_y - 105, satellite_info['above'], fontsize=font_size, family=font)
+        ax3.text(constant_x, constant_y - 120, satellite_info['epoch'], fontsize=font_size, family=font)
+        return template.render()
+
+
+# draws ground track of satellite with arrows, track is split where it crosses 180° meridian
+# input: (map axes, trajectory from satellite.trajectory)
+# output: nothing
+def draw_map_track(ax1, trajectory):
+    trajectory = np.asarray(trajectory, dtype=float).reshape(-1, 4)
+    #                            lon x             lat y
+    parts = split_track(trajectory[:, 0], trajectory[:, 1], -180, 180)
+    draw_track(ax1, parts, width=0.0000013 if len(parts) == 1 else 0.0000002)
+
+
+# draws satellite track seen from device on radar with arrows, only part above horizon is drawn
+# input: (radar axes, trajectory from satellite.trajectory)
+# output: nothing
+def draw_radar_track(ax2, trajectory):
+    trajectory = np.asarray(trajectory, dtype=float).reshape(-1, 4)
+    x_direction = np.radians(trajectory[:, 2])
+    y_direction = 90 - trajectory[:, 3]
+
+    # every run of points above horizon is drawn as separate line
+    above = trajectory[:, 3] >= 0
+    edges = np.flatnonzero(np.diff(above.astype(int))) + 1
+    parts = []
+    for indexes in np.split(np.arange(len(trajectory)), edges):
+        if len(indexes) and above[indexes[0]]:
+            parts += split_track(x_direction[indexes], y_direction[indexes], 0, 2 * np.pi)
+    draw_track(ax2, parts, width=0.0000008)
+
+
+# splits track into parts where it jumps over edge of map, both parts are extended to the edge
+# input: (x array, y array, lowest x on map, highest x on map)
+# output: [*array of [x, y] points]
+def split_track(x, y, low, high):
+    period = high - low
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) == 0:
+        return []
+    jumps = np.flatnonzero(np.abs(np.diff(x)) > period / 2)
+    parts = np.split(np.column_stack((x, y)), jumps + 1)
+
+    # point where track crosses edge, interpolated on unwrapped line between both sides of jump
+    going_up = x[jumps] > x[jumps + 1]
+    edge = np.where(going_up, high, low)
+    other_edge = np.where(going_up, low, high)
+    x_next = x[jumps + 1] + np.where(going_up, period, -period)
+    fraction = (edge - x[jumps]) / (x_next - x[jumps])
+    y_edge = y[jumps] + fraction * (y[jumps + 1] - y[jumps])
+    for number in range(len(jumps)):
+        parts[number] = np.vstack((parts[number], [edge[number], y_edge[number]]))
+        parts[number + 1] = np.vstack(([other_edge[number], y_edge[number]], parts[number + 1]))
+    return parts
+
+
+# draws all parts of track as one line collection with one arrow on every segment from single quiver
+# every next part of track is more transparent
+# input: (axes, [*array of [x, y] points], width of arrow shaft)
+# output: nothing
+def draw_track(ax, parts, width):
+    parts = [part for part in parts if len(part) > 1]
+    if not parts:
+        return
+    colors = [to_rgba('r', 1 - (item / len(parts))) for item in range(len(parts))]
+    ax.add_collection(LineCollection(parts, colors=colors), autolim=False)
+
+    starts = np.vstack([part[:-1] for part in parts])
+    vectors = np.vstack([np.diff(part, axis=0) for part in parts])
+    arrow_colors = np.repeat(colors, [len(part) - 1 for part in parts], axis=0)
+    # head is longer than any segment, so quiver shrinks every arrow to head as long as its segment
+    head = np.max(np.hypot(vectors[:, 0], vectors[:, 1])) / width + 1
+    ax.quiver(starts[:, 0], starts[:, 1], vectors[:, 0], vectors[:, 1], angles='xy',
+              scale_units='xy', scale=1,
+              headwidth=head,
+              headaxislength=head,
+              headlength=head,
+              width=width,
+              color=arrow_colors)
+
+
+def satellite_radar(sats_data, sats_pos, size=(10, 5)):
+    template = get_template('radar', size)
+    with template as (ax1,):
+        for sat in sats_pos:
+            if sat[1][1] < 0:
+                sat[1][1] = 90
+            else:
+                sat[1][1] = 90 - sat[1][1]
+
+            ax1.plot(math.radians(float(sat[1][0])), sat[1][1], marker=".", markersize=10, c='r')
+            ab = AnnotationBbox(OffsetImage(load_image(SATELLITE_IMAGE), zoom=0.10),
+                                (math.radians(float(sat[1][0])), sat[1][1]), frameon=False)
+            ax1.add_artist(ab)
+
+        for flyby in sats_data:
+            path = flyby.trajectory
+            x = []
+            y = []
+            for point in path:
+                x.append(math.radians(point[0]))
+                y.append(90-point[1])
+            ax1.plot(x, y, c='r', alpha=1)
+
+        return template.render()
\ No newline at end of file
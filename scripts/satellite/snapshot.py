@@ -0,0 +1,98 @@
+from sgp4.api import SatrecArray
+from skyfield.api import wgs84
+from skyfield.constants import AU_KM
+from skyfield.framelib import itrs
+from skyfield.positionlib import Geocentric, ICRF
+from skyfield.sgp4lib import TEME
+
+import numpy as np
+import threading
+
+from scripts.satellite import satellite
+from scripts.satellite import observer
+from scripts.satellite import ephemeris
+from scripts.satellite import ephemeris_cache
+from scripts.utils import clock
+
+# SatrecArray of last requested catalog, it is built again only when list of satellites changes
+lock = threading.Lock()
+catalog_key = None
+catalog_array = None
+
+
+# returns sgp4 SatrecArray with elements of all satellites
+# input: [*satellite]
+# output: SatrecArray
+def get_satrec_array(satellites):
+    global catalog_key, catalog_array
+    key = tuple(item.tle for item in satellites)
+    with lock:
+        if key != catalog_key:
+            catalog_array = SatrecArray([item.satellite_object.model for item in satellites])
+            catalog_key = key
+        return catalog_array
+
+
+# returns position of every satellite of catalog at one shared moment
+# all satellites are propagated together in one sgp4 call
+# input: ([*satellite], [longitude, latitude] of device, skyfield Time (now when not given))
+# output: {'time','name','epoch','lon','lat','alt','azimut','elevation','distance','above','error'}
+#         every value except time is list or array with one item per satellite
+def snapshot(satellites, current_position, t=None):
+    if t is None:
+        t = clock.skyfield_time(satellite.ts)
+    device = observer.get_observer(current_position)
+    count = len(satellites)
+    result = {"time": t,
+              "name": [item.satellite_object.name for item in satellites],
+              "epoch": t.tt - np.array([item.satellite_object.epoch.tt for item in satellites], dtype=float),
+              }
+    if count == 0:
+        for key in ("lon", "lat", "alt", "azimut", "elevation", "distance", "error"):
+            result[key] = np.zeros(0)
+        result["above"] = np.zeros(0, dtype=bool)
+        return result
+
+    # positions are interpolated from cached ephemeris, sgp4 runs only for satellites missing in it
+    # or for whole catalog when there is no table (its files were removed by other process)
+    table = ephemeris_cache.default_cache.get(t)
+    rows = [table.row(item) for item in satellites] if table is not None else [None]
+    if table is not None and table.covers(t) and None not in rows:
+        position = table.positions(rows, t)
+        result["lon"], result["lat"], result["alt"] = ephemeris.geodetic(position)
+        result["azimut"], result["elevation"], result["distance"] = ephemeris.look_angles(position, device)
+        result["above"] = result["elevation"] > 0
+        result["error"] = np.zeros(count, dtype=int)
+        return result
+
+    # same time split and TEME rotation as skyfield EarthSatellite uses for single satellite
+    jd = np.array([t.whole])
+    fraction = np.array([t.ut1_fraction - t.dut1 / 86400])
+    error, position, velocity = get_satrec_array(satellites).sgp4(jd, fraction)
+    position = np.swapaxes(TEME.rotation_at(t), 0, 1) @ (position[:, 0, :].T / AU_KM)
+
+    geographic = wgs84.geographic_position_of(Geocentric(position, t=t))
+    topocentric = ICRF(position - device.topos.at(t).position.au[:, None], t=t, center=device.topos)
+    elevation, azimut, distance = topocentric.altaz()
+
+    result["lon"] = geographic.longitude.degrees
+    result["lat"] = geographic.latitude.degrees
+    result["alt"] = geographic.elevation.km
+    result["azimut"] = azimut.degrees
+    result["elevation"] = elevation.degrees
+    result["distance"] = distance.km
+    result["above"] = elevation.degrees > 0
+    result["error"] = error[:, 0]
+    return result
+
+
+# returns informations about every satellite of catalog in the same dicts as satellite.get_informations
+# input: ([*satellite], [longitude, latitude] of device)
+# output: [*{'name','epoch','lon','lat','alt','azimut','elevation','distance','above'}]
+def get_informations(satellites, current_position):
+    data = snapshot(satellites, current_position)
+    return [satellite.format_informations(data["name"][x], data["epoch"][x],
+                                          float(data["lon"][x]), float(data["lat"][x]), int(data["alt"][x]),
+                                          float(data["azimut"][x]), float(data["elevation"][x]),
+                                          int(data["distance"][x]), bool(data["above"][x]))
+            for x in range(len(satellites))]
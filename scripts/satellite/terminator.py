@@ -0,0 +1,101 @@
+import astropy.coordinates as coord
+from astropy.time import Time
+
+import numpy as np
+from collections import OrderedDict
+import threading
+
+from scripts.satellite import footprint
+from scripts.utils import clock
+
+# night changes slowly, maps rendered within this many seconds share one night mask
+NIGHT_BUCKET = 60
+night_masks = OrderedDict()
+night_masks_lock = threading.Lock()
+
+
+# returns geographic point where sun is in zenith
+# input: astropy Time of render (now when not given)
+# output: [longitude, latitude]
+def subsolar_point(now=None):
+    if now is None:
+        now = clock.astropy_time()
+    sun = coord.get_sun(now).transform_to(coord.ITRS(obstime=now))
+    longitude = (float(sun.spherical.lon.deg) + 180) % 360 - 180
+    return [longitude, float(sun.spherical.lat.deg)]
+
+
+# returns centres of lat/lon grid cells, mask sampled at them covers whole map when drawn with extent of whole map
+# input: resolution in float
+# output: (lon 2d array in degrees, lat 2d array in degrees)
+def cell_centres(resolution):
+    lon = (np.arange(int(360 * resolution)) + 0.5) / resolution - 180
+    lat = (np.arange(int(180 * resolution)) + 0.5) / resolution - 90
+    return np.meshgrid(lon, lat)
+
+
+# returns elevation of sun seen from centre of every cell of lat/lon grid
+# sun position is computed only once, all cells share the same timestamp
+# input: (resolution in float, astropy Time of render)
+# output: (lon 2d array, lat 2d array, elevation 2d array in degrees)
+def sun_elevation_grid(resolution, now=None):
+    sun_lon, sun_lat = np.radians(subsolar_point(now))
+    sun_direction = np.array([np.cos(sun_lat) * np.cos(sun_lon),
+                              np.cos(sun_lat) * np.sin(sun_lon),
+                              np.sin(sun_lat)])
+    lon, lat = cell_centres(resolution)
+    up = footprint.ground_vectors(lon, lat)[1]
+    elevation = np.degrees(np.arcsin(np.tensordot(sun_direction, up, axes=1)))
+    return lon, lat, elevation
+
+
+# returns mask of grid cells where is night on earth
+# input: (resolution in float, astropy Time of render)
+# output: (lon 2d array, lat 2d array, bool 2d array)
+def night_mask(resolution, now=None):
+    lon, lat, elevation = sun_elevation_grid(resolution, now)
+    return lon, lat, elevation < 0
+
+
+# returns mask of grid cells where is night on earth for start of time bucket containing given moment
+# mask is computed only once per bucket and resolution, so all maps of one /auto cycle share it
+# input: (resolution in float, astropy Time of render (now when not given), length of bucket in seconds)
+# output: (lon 2d array, lat 2d array, bool 2d array)
+def cached_night_mask(resolution, now=None, bucket=NIGHT_BUCKET):
+    if now is None:
+        now = clock.astropy_time()
+    key = (resolution, bucket, int(now.unix // bucket))
+    with night_masks_lock:
+        if key in night_masks:
+            night_masks.move_to_end(key)
+            return night_masks[key]
+    mask = night_mask(resolution, Time(key[2] * bucket, format='unix'))
+    with night_masks_lock:
+        night_masks[key] = mask
+        while len(night_masks) > 16:
+            night_masks.popitem(last=False)
+    return mask
+
+
+# returns points where is night on earth
+# input: (resolution in float (minimum:0.1 optimal:0.2 ultra:1), astropy Time of render)
+# output: [*[x,y]]
+def night_zone(resolution, now=None):
+    lon, lat, mask = night_mask(resolution, now)
+    return np.column_stack((lon[mask], lat[mask])).tolist()
+
+
+# returns polygon of area where is night on earth
+# line between day and night is closed over the pole that is currently in darkness
+# input: (resolution in float, astropy Time of render)
+# output: [*[x,y]]
+def night_polygon(resolution, now=None):
+    sun_lon, sun_lat = subsolar_point(now)
+    if abs(sun_lat) < 1e-6:  # equinox, terminator goes through the poles
+        sun_lat = 1e-6
+    lon = np.linspace(-180, 180, int(360 * resolution) + 1)
+    lat = np.degrees(np.arctan(-np.cos(np.radians(lon - sun_lon)) / np.tan(np.radians(sun_lat))))
+    pole = -90 if sun_lat > 0 else 90
+    polygon = np.column_stack((lon, lat)).tolist()
+    polygon += [[180, pole], [-180, pole], polygon[0]]
+    return polygon
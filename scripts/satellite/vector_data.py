@@ -0,0 +1,150 @@
+import numpy as np
+
+from scripts.satellite import terminator
+from scripts.satellite import satellite_plot
+
+# decimals kept in coordinates, 4 decimals of degree are about 11 m on ground
+PRECISION = 4
+
+
+# returns line without points that are closer than tolerance to line between points kept around them
+# (ramer-douglas-peucker), first and last point are always kept
+# input: (array of [x, y] points, tolerance in units of points, 0 keeps every point)
+# output: array of [x, y] points
+def simplify(points, tolerance):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if tolerance <= 0 or len(points) < 3:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start = points[first]
+        direction = points[last] - start
+        inner = points[first + 1:last] - start
+        length = np.hypot(direction[0], direction[1])
+        if length == 0:
+            distance = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            distance = np.abs(direction[0] * inner[:, 1] - direction[1] * inner[:, 0]) / length
+        index = int(np.argmax(distance))
+        if distance[index] > tolerance:
+            middle = first + 1 + index
+            keep[middle] = True
+            stack += [(first, middle), (middle, last)]
+    return points[keep]
+
+
+# returns points as rounded lists ready for json
+# input: array of [x, y] points
+# output: [*[x, y]]
+def coordinates(points):
+    return np.round(points, PRECISION).tolist()
+
+
+# returns geojson feature
+# input: (type of geometry, coordinates of geometry, properties of feature)
+# output: dict
+def feature(geometry_type, geometry_coordinates, **properties):
+    return {"type": "Feature",
+            "geometry": {"type": geometry_type, "coordinates": geometry_coordinates},
+            "properties": properties}
+
+
+# returns geojson point of device
+# input: [longitude, latitude] of device
+# output: dict
+def device_feature(current_position):
+    return feature("Point", coordinates([[current_position[0], current_position[1]]])[0], kind="device")
+
+
+# returns geojson point of satellite with its position seen from device
+# input: (name, longitude, latitude, altitude in km, azimut, elevation, distance in km, is above horizon)
+# output: dict
+def satellite_feature(name, lon, lat, alt, azimut, elevation, distance, above):
+    return feature("Point", coordinates([[float(lon), float(lat)]])[0], kind="satellite", name=name,
+                   alt=round(float(alt), 1), azimut=round(float(azimut), 2), elevation=round(float(elevation), 2),
+                   distance=round(float(distance), 1), above=bool(above))
+
+
+# returns geojson points of all satellites of catalog
+# input: (dict from snapshot.snapshot, [longitude, latitude] of device)
+# output: geojson FeatureCollection
+def satellites_features(positions, current_position):
+    features = [device_feature(current_position)]
+    for x, name in enumerate(positions["name"]):
+        features.append(satellite_feature(name, positions["lon"][x], positions["lat"][x], positions["alt"][x],
+                                          positions["azimut"][x], positions["elevation"][x],
+                                          positions["distance"][x], positions["above"][x]))
+    return {"type": "FeatureCollection", "features": features}
+
+
+# returns ground track of satellite, line is split where it crosses 180th meridian
+# input: (trajectory from satellite.trajectory, tolerance of simplification in degrees)
+# output: geojson feature with MultiLineString
+def track_feature(trajectory, tolerance):
+    trajectory = np.asarray(trajectory, dtype=float).reshape(-1, 4)
+    #                                        lon x             lat y
+    parts = satellite_plot.split_track(trajectory[:, 0], trajectory[:, 1], -180, 180)
+    lines = [coordinates(simplify(part, tolerance)) for part in parts if len(part) > 1]
+    return feature("MultiLineString", lines, kind="track")
+
+
+# returns area visible from satellite
+# input: (polygon from satellite.satellite_visible_zone, tolerance of simplification in degrees)
+# output: geojson feature with Polygon
+def footprint_feature(zone, tolerance):
+    return feature("Polygon", [coordinates(simplify(zone, tolerance))], kind="footprint")
+
+
+# returns area where is night on earth
+# input: (resolution in float, tolerance of simplification in degrees, astropy Time (now when not given))
+# output: geojson feature with Polygon
+def night_feature(resolution, tolerance, now=None):
+    polygon = terminator.night_polygon(resolution, now)
+    return feature("Polygon", [coordinates(simplify(polygon, tolerance))], kind="night")
+
+
+# returns parts of track seen from device that are above horizon
+# input: ([*[azimut, elevation]] or trajectory from satellite.trajectory, tolerance of simplification in degrees)
+# output: [*[*[azimut, elevation]]]
+def radar_paths(trajectory, tolerance):
+    trajectory = np.asarray(trajectory, dtype=float)
+    trajectory = trajectory.reshape(-1, trajectory.shape[-1])[:, -2:]
+    above = trajectory[:, 1] >= 0
+    edges = np.flatnonzero(np.diff(above.astype(int))) + 1
+    paths = []
+    for indexes in np.split(np.arange(len(trajectory)), edges):
+        if len(indexes) and above[indexes[0]]:
+            parts = satellite_plot.split_track(trajectory[indexes, 0], trajectory[indexes, 1], 0, 360)
+            paths += [coordinates(simplify(part, tolerance)) for part in parts if len(part) > 1]
+    return paths
+
+
+# returns everything drawn by satellite_plot.satellite_map as geojson, client draws map itself
+# arguments are the same as satellite_map has, radar paths are in foreign member 'radar'
+# input: (satellite, [longitude, latitude] of device, satellite_map keyword arguments, tolerance of simplification)
+# output: geojson FeatureCollection
+def satellite_map(satellite,
+                  current_position,
+                  satellite_resolution=0.1,
+                  sun_resolution=0.1,
+                  path_resolution=100,
+                  before_time=0,
+                  after_time=3600,
+                  draw_sat_area=False,
+                  draw_sun_area=False,
+                  tolerance=0.05):
+    trajectory = satellite.trajectory(before_time, after_time, path_resolution, current_position)
+    features = [device_feature(current_position),
+                satellite_feature(satellite.satellite_object.name, *satellite.get_geo_position(),
+                                  *satellite.azimut(current_position)),
+                track_feature(trajectory, tolerance)]
+    if draw_sat_area:
+        features.append(footprint_feature(satellite.satellite_visible_zone(satellite_resolution), tolerance))
+    if draw_sun_area:
+        features.append(night_feature(sun_resolution, tolerance))
+    return {"type": "FeatureCollection", "features": features, "radar": radar_paths(trajectory, tolerance)}
@@ -0,0 +1,145 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import io
+import sys
+import os
+
+# requests starting with these paths propagate satellites or draw images
+HEAVY_PATHS = ('/ssm', '/sfr', '/auto', '/draw', '/api/map', '/api/radar', '/api/satellites', '/api/night')
+# requests that keep connection open and send events until client leaves
+STREAM_PATHS = ('/api/live', '/job/')
+
+
+# runs wsgi app (flask) under asgi server, event loop only moves bytes and never computes anything
+# every request runs in executor chosen by its path, so heavy renders cannot take threads of light pages
+# (index, favicon, static files, job state) and long event streams cannot take threads of renders
+class asgi_adapter:
+    def __init__(self, wsgi_app, light_workers=4, heavy_workers=0, stream_workers=32):
+        self.wsgi_app = wsgi_app
+        # 0 means one worker per cpu core
+        self.light = ThreadPoolExecutor(max_workers=light_workers, thread_name_prefix='light')
+        self.heavy = ThreadPoolExecutor(max_workers=heavy_workers or os.cpu_count(), thread_name_prefix='heavy')
+        self.stream = ThreadPoolExecutor(max_workers=stream_workers, thread_name_prefix='stream')
+
+    # returns executor for request
+    # input: path of request
+    # output: ThreadPoolExecutor
+    def get_executor(self, path):
+        if path.startswith(STREAM_PATHS) and (not path.startswith('/job/') or path.endswith('/events')):
+            return self.stream
+        if path.startswith(HEAVY_PATHS):
+            return self.heavy
+        return self.light
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for executor in (self.light, self.heavy, self.stream):
+                    executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def http(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b'')
+            if not message.get("more_body", False):
+                break
+
+        loop = asyncio.get_running_loop()
+        executor = self.get_executor(scope["path"])
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(' ', 1)[0])
+            response["headers"] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        # client leaving is noticed between chunks, generator of event stream is then closed in its own thread
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch())
+        chunks = await loop.run_in_executor(executor, self.wsgi_app, environ(scope, body), start_response)
+        iterator = iter(chunks)
+        try:
+            started = False
+            while not disconnected.is_set():
+                chunk = await loop.run_in_executor(executor, next, iterator, None)
+                if chunk is None:
+                    break
+                if not started:
+                    await send({"type": "http.response.start", "status": response["status"],
+                                "headers": response["headers"]})
+                    started = True
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not disconnected.is_set():
+                if not started:
+                    await send({"type": "http.response.start", "status": response["status"],
+                                "headers": response["headers"]})
+                await send({"type": "http.response.body", "body": b'', "more_body": False})
+        finally:
+            watcher.cancel()
+            if hasattr(chunks, 'close'):
+                await loop.run_in_executor(executor, chunks.close)
+
+
+# returns wsgi environ of asgi request
+# input: (asgi http scope, body of request)
+# output: dict
+def environ(scope, body):
+    server = scope.get("server") or ('localhost', 80)
+    client = scope.get("client") or ('', 0)
+    # wsgi expects decoded path as latin-1 string of its utf-8 bytes, raw_path is still percent-encoded
+    # and is kept only as REQUEST_URI, path of asgi can start with root_path which belongs to SCRIPT_NAME
+    root_path = scope.get("root_path", '')
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    query = scope.get("query_string", b'')
+    raw_path = scope.get("raw_path") or scope["path"].encode('utf-8')
+    result = {"REQUEST_METHOD": scope["method"],
+              "SCRIPT_NAME": root_path.encode('utf-8').decode('latin-1'),
+              "PATH_INFO": path.encode('utf-8').decode('latin-1'),
+              "QUERY_STRING": query.decode('latin-1'),
+              "REQUEST_URI": (raw_path + (b'?' + query if query else b'')).decode('latin-1'),
+              "SERVER_NAME": str(server[0]),
+              "SERVER_PORT": str(server[1]),
+              "SERVER_PROTOCOL": f'HTTP/{scope.get("http_version", "1.1")}',
+              "REMOTE_ADDR": str(client[0]),
+              "REMOTE_PORT": str(client[1]),
+              "CONTENT_LENGTH": str(len(body)),
+              "wsgi.version": (1, 0),
+              "wsgi.url_scheme": scope.get("scheme", 'http'),
+              "wsgi.input": io.BytesIO(body),
+              "wsgi.errors": sys.stderr,
+              "wsgi.multithread": True,
+              "wsgi.multiprocess": False,
+              "wsgi.run_once": False,
+              }
+    for name, value in scope.get("headers", []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            result["CONTENT_TYPE"] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            result[key] = f'{result[key]},{value}' if key in result else value
+    return result
@@ -0,0 +1,277 @@
+from pathlib import Path
+from pprint import pprint
+import argparse
+import datetime
+import platform
+import tempfile
+import statistics
+import json
+import time
+import sys
+import os
+
+ROOT_DIR = str(Path(__file__).parent.parent.parent.as_posix())  # This is your Project Root
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from astropy.utils import iers
+import numpy as np
+import skyfield
+import sgp4
+import pytz
+
+from scripts.utils import read_config
+from scripts.utils import read_tle
+from scripts.utils import clock
+from scripts.satellite import satellite
+from scripts.satellite import registry
+from scripts.satellite import snapshot
+from scripts.satellite import ephemeris_cache
+from scripts.satellite import pass_cache
+from scripts.satellite import pass_pool
+from scripts.satellite import satellite_plot
+
+# tle with fixed epoch, benchmark never reads tle config of server so results do not change with it
+TLE_PATH = ROOT_DIR + "/config/benchmark_tle.cfg"
+BASELINE_PATH = ROOT_DIR + "/config/benchmark_baseline.json"
+# every run computes positions for the same moment (2021-06-17 00:00:00 utc, one day after epoch of tle)
+FROZEN_TIME = 1623888000
+#                 lon x                 lat y
+DEVICE_POSITION = [18.562670074241918, 54.408011976695924]
+CATALOG_SIZES = [1, 100, 1000]
+
+
+# returns tle line with correct checksum
+# input: tle line (checksum digit is replaced)
+# output: tle line
+def with_checksum(line):
+    line = line[:68]
+    return line + str(read_tle.checksum(line))
+
+
+# returns catalog of given size made from tle of benchmark, every copy of satellite gets its own norad id and
+# is moved along its orbit and around earth, so satellites do not share positions nor passes
+# input: (list of 3 line tle strings, number of satellites)
+# output: tle file content
+def synthetic_catalog(tles, count):
+    lines = []
+    for x in range(count):
+        name, line1, line2 = tles[x % len(tles)].splitlines()
+        copy = x // len(tles)
+        if copy == 0:
+            lines += [name, line1, line2]
+            continue
+        norad = f'{90000 + x:05d}'
+        raan = (float(line2[17:25]) + copy * 137.508) % 360
+        mean_anomaly = (float(line2[43:51]) + copy * 47.0) % 360
+        line1 = with_checksum(f'{line1[:2]}{norad}{line1[7:]}')
+        line2 = with_checksum(f'{line2[:2]}{norad}{line2[7:17]}{raan:8.4f}{line2[25:43]}{mean_anomaly:8.4f}{line2[51:]}')
+        lines += [f'{name} #{copy}', line1, line2]
+    return '\n'.join(lines) + '\n'
+
+
+# prepares satellites of every catalog size, each catalog gets its own tle file and registry
+# ephemeris of catalogs is saved in temporary directory, cache of server is never touched
+class catalogs:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(TLE_PATH, 'r') as file:
+            self.tles = [tle for group, tle in read_tle.iter_tle(file, TLE_PATH)]
+        self.registries = {}
+        ephemeris_cache.default_cache = ephemeris_cache.ephemeris_cache(f'{directory}/cache',
+                                                                       hours=ephemeris_cache.config["ephemeris_hours"],
+                                                                       step=ephemeris_cache.config["ephemeris_step"])
+
+    # makes catalog of given size shared by whole process and returns its satellites
+    # input: number of satellites
+    # output: [*satellite]
+    def use(self, count):
+        if count not in self.registries:
+            path = f'{self.directory}/tle_{count}.cfg'
+            with open(path, 'w') as file:
+                file.write(synthetic_catalog(self.tles, count))
+            self.registries[count] = registry.satellite_registry(path)
+        registry.default_registry = self.registries[count]
+        return registry.get_satellites()
+
+
+# returns all benchmark cases
+# input: catalogs
+# output: [*[name of case, setup function, measured function]] setup is run before every measurement
+def get_cases(data):
+    start = datetime.datetime.fromtimestamp(FROZEN_TIME, pytz.utc)
+    single = data.use(1)[0]
+    cases = []
+
+    def nothing():
+        pass
+
+    # ephemeris of catalog is built outside of measurement, like in running server
+    def catalog(count):
+        def setup():
+            data.use(count)
+            ephemeris_cache.default_cache.get(satellite.ts.from_datetime(start))
+        return setup
+
+    def cold_interpolation():
+        single.interpolation = None
+
+    cases.append(['get_informations[interpolated]', nothing, lambda: single.get_informations(DEVICE_POSITION)])
+    cases.append(['get_informations[cold]', cold_interpolation, lambda: single.get_informations(DEVICE_POSITION)])
+    for count in CATALOG_SIZES:
+        satellites = data.use(count)
+        cases.append([f'snapshot.get_informations[{count} satellites]', catalog(count),
+                      lambda satellites=satellites: snapshot.get_informations(satellites, DEVICE_POSITION)])
+
+    for resolution in [100, 1000, 10000]:
+        cases.append([f'trajectory[{resolution} points]', nothing,
+                      lambda resolution=resolution: single.trajectory(0, 3600, resolution, DEVICE_POSITION)])
+
+    # pass cache is cleared so every measurement searches whole window
+    for days in [1, 7]:
+        cases.append([f'flyby[{days} days]', pass_cache.default_cache.clear,
+                      lambda days=days: single.flyby(DEVICE_POSITION, start, start + datetime.timedelta(days=days), 10)])
+    pool = pass_pool.pass_pool(workers=0, deadline=0)
+    stations = [['benchmark', DEVICE_POSITION]]
+    for count in CATALOG_SIZES[:2]:
+        satellites = data.use(count)
+        cases.append([f'pass_pool.flyby[{count} satellites, 1 day]', pass_cache.default_cache.clear,
+                      lambda satellites=satellites: pool.flyby(satellites, stations, start,
+                                                               start + datetime.timedelta(days=1), 10)])
+
+    for resolution in [0.1, 0.2, 0.5]:
+        cases.append([f'satellite_visible_zone[{resolution}]', nothing,
+                      lambda resolution=resolution: single.satellite_visible_zone(resolution)])
+    for resolution in [0.1, 0.2, 0.5]:
+        cases.append([f'sun_visible_zone[{resolution}]', nothing,
+                      lambda resolution=resolution: single.sun_visible_zone(resolution)])
+
+    cases.append(['satellite_map[track]', nothing,
+                  lambda: satellite_plot.satellite_map(single, DEVICE_POSITION)])
+    cases.append(['satellite_map[track 400, areas 0.5]', nothing,
+                  lambda: satellite_plot.satellite_map(single, DEVICE_POSITION, satellite_resolution=0.5,
+                                                       sun_resolution=0.5, path_resolution=400,
+                                                       draw_sat_area=True, draw_sun_area=True)])
+    image = satellite_plot.satellite_map(single, DEVICE_POSITION)
+    for image_format in ['png', 'webp']:
+        cases.append([f'encode[{image_format}]', nothing,
+                      lambda image_format=image_format: image.encode(image_format)])
+
+    for count in [4, 100]:
+        satellites = data.use(count)
+        pass_cache.default_cache.clear()
+        passes = pool.flyby(satellites, stations, start, start + datetime.timedelta(days=1), 10)
+        positions = snapshot.snapshot(satellites, DEVICE_POSITION)
+
+        # radar changes elevations of positions it gets, so every measurement gets new copy
+        def radar(satellites=satellites, passes=passes, positions=positions):
+            sats_pos = [[item.satellite_object.name, [positions["azimut"][x], positions["elevation"][x]]]
+                        for x, item in enumerate(satellites)]
+            return satellite_plot.satellite_radar(passes, sats_pos)
+        cases.append([f'satellite_radar[{count} satellites, {len(passes)} passes]', nothing, radar])
+    return cases
+
+
+# measures one case
+# input: (setup function, measured function, number of measurements, number of runs before measuring)
+# output: {'min','median','mean','runs'} with times in milliseconds
+def measure(setup, function, repeat, warmup):
+    for x in range(warmup):
+        setup()
+        function()
+    times = []
+    for x in range(repeat):
+        setup()
+        started = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - started) * 1000)
+    return {"min": round(min(times), 3),
+            "median": round(statistics.median(times), 3),
+            "mean": round(statistics.mean(times), 3),
+            "runs": repeat,
+            }
+
+
+# returns cases whose median is slower than median of baseline by more than threshold
+# every case is divided by median slowdown of all cases, so machine that is busy or slower than the one
+# of baseline does not fail all of them, only cases that got slower than the rest are reported
+# input: (results of run, results of baseline, allowed slowdown as fraction)
+# output: {name of case: {'baseline','median','change'}} change is fraction of baseline median after correction
+def compare(results, baseline, threshold):
+    names = [name for name in results["cases"] if baseline["cases"].get(name, {}).get("median", 0) > 0]
+    ratios = [results["cases"][name]["median"] / baseline["cases"][name]["median"] for name in names]
+    # few cases are not enough to tell speed of machine from regression
+    machine = statistics.median(ratios) if len(ratios) >= 5 else 1.0
+    results["machine"] = round(machine, 3)
+    regressions = {}
+    for name, ratio in zip(names, ratios):
+        change = ratio / machine - 1
+        results["cases"][name]["change"] = round(change, 3)
+        if change > threshold:
+            regressions[name] = {"baseline": baseline["cases"][name]["median"],
+                                 "median": results["cases"][name]["median"], "change": round(change, 3)}
+    return regressions
+
+
+# runs all cases matching filter with clock frozen at FROZEN_TIME
+# input: (number of measurements, number of runs before measuring, part of case name or None)
+# output: {'meta','cases'}
+def run(repeat, warmup, name_filter=None):
+    # iers tables bundled with astropy cover frozen moment, nothing is downloaded
+    iers.conf.auto_download = False
+    clock.freeze(FROZEN_TIME)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            cases = get_cases(catalogs(directory))
+            results = {}
+            for name, setup, function in cases:
+                if name_filter and name_filter not in name:
+                    continue
+                results[name] = measure(setup, function, repeat, warmup)
+                print(f'{name}: {results[name]["median"]} ms')
+    finally:
+        clock.freeze(None)
+    return {"meta": {"time": FROZEN_TIME,
+                     "python": platform.python_version(),
+                     "numpy": np.__version__,
+                     "skyfield": skyfield.__version__,
+                     "sgp4": sgp4.__version__,
+                     "machine": platform.machine(),
+                     "cpu_count": os.cpu_count(),
+                     "config": read_config.read_config(),
+                     },
+            "cases": results,
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='measures propagation, pass search and rendering on fixed tle')
+    parser.add_argument('--repeat', type=int, default=7, help='measurements of every case')
+    parser.add_argument('--warmup', type=int, default=1, help='runs of every case before measuring')
+    parser.add_argument('--filter', default=None, help='runs only cases with this text in name')
+    parser.add_argument('--output', default=None, help='file where results are saved as json')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='results compared with this run')
+    parser.add_argument('--save', action='store_true', help='saves results as new baseline')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='slowdown of median against baseline reported as regression (0.5 = 50%%)')
+    arguments = parser.parse_args()
+
+    results = run(arguments.repeat, arguments.warmup, arguments.filter)
+    regressions = {}
+    if arguments.save:
+        with open(arguments.baseline, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f'baseline saved to {arguments.baseline}')
+    elif os.path.exists(arguments.baseline):
+        with open(arguments.baseline, 'r') as file:
+            regressions = compare(results, json.load(file), arguments.threshold)
+    results["regressions"] = regressions
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=4)
+    if regressions:
+        print('regressions against baseline:')
+        pprint(regressions)
+    print(json.dumps(results))
+    sys.exit(1 if regressions else 0)
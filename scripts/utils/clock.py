@@ -0,0 +1,37 @@
+from astropy.time import Time
+
+import datetime
+import time
+import pytz
+
+# moment used instead of current time when it is set, benchmarks freeze it so every run computes the same positions
+frozen = None
+
+
+# returns current unix time
+# input: nothing
+# output: seconds
+def unix():
+    return time.time() if frozen is None else frozen
+
+
+# returns current time as skyfield Time
+# input: skyfield Timescale
+# output: skyfield Time
+def skyfield_time(ts):
+    return ts.from_datetime(datetime.datetime.fromtimestamp(unix(), pytz.utc))
+
+
+# returns current time as astropy Time
+# input: nothing
+# output: astropy Time
+def astropy_time():
+    return Time.now() if frozen is None else Time(frozen, format='unix')
+
+
+# makes every function of clock return given moment, None brings back real time
+# input: unix time or None
+# output: nothing
+def freeze(when):
+    global frozen
+    frozen = when
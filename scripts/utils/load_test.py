@@ -0,0 +1,197 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from pprint import pprint
+import urllib.request
+import urllib.parse
+import urllib.error
+import argparse
+import asyncio
+import itertools
+import threading
+import json
+import time
+import sys
+
+ROOT_DIR = str(Path(__file__).parent.parent.parent.as_posix())  # This is your Project Root
+
+# map drawn by render worker processes, request posts form to /draw and polls /job/<id> until map is ready
+DRAW_REQUEST = '/draw'
+# requests that keep server busy with propagation and rendering
+HEAVY_REQUESTS = ['/api/map?sat={sat}&path_resolution=400&draw_sat_area=1&draw_sun_area=1&satellite_resolution=0.5',
+                  '/api/radar?hours=24&angle=10',
+                  '/api/satellites',
+                  '/ssm',
+                  DRAW_REQUEST]
+# requests that must stay fast while heavy ones run, name of file has spaces and brackets like names of satellites,
+# so percent-encoded path is decoded the same way flask development server does it
+LIGHT_REQUESTS = ['/', '/favicon.ico', '/static/dynamic_images/NOAA%2018%20%5BB%5D.png']
+
+
+# sends requests to server over http
+class http_client:
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    # input: (path with query, form values sent with POST (GET when not given))
+    # output: (status code, body)
+    def fetch(self, path, form=None):
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        try:
+            with urllib.request.urlopen(self.url + path, data=data, timeout=120) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+# sends requests straight to asgi application of asgi.py, no server is needed
+# application runs on event loop in background thread like under real asgi server
+class asgi_client:
+    def __init__(self):
+        sys.path.insert(0, ROOT_DIR)
+        import asgi
+        self.application = asgi.application
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    async def request(self, path, form=None):
+        path, _, query = path.partition('?')
+        headers = [(b'host', b'localhost')]
+        body = b''
+        if form is not None:
+            body = urllib.parse.urlencode(form).encode()
+            headers.append((b'content-type', b'application/x-www-form-urlencoded'))
+        scope = {"type": "http", "method": "GET" if form is None else "POST", "path": urllib.parse.unquote(path),
+                 "raw_path": path.encode(), "query_string": query.encode(), "headers": headers,
+                 "http_version": "1.1", "scheme": "http", "server": ('localhost', 80), "client": ('127.0.0.1', 0),
+                 "root_path": ''}
+        finished = asyncio.Event()
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        status = []
+        chunks = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            else:
+                chunks.append(message.get("body", b''))
+                if not message.get("more_body", False):
+                    finished.set()
+
+        await self.application(scope, receive, send)
+        return status[0], b''.join(chunks)
+
+    # input: (path with query, form values sent with POST (GET when not given))
+    # output: (status code, body)
+    def fetch(self, path, form=None):
+        return asyncio.run_coroutine_threadsafe(self.request(path, form), self.loop).result()
+
+
+# posts map form to /draw and polls /job/<id> until job is finished, every call asks for map with other
+# path resolution so it is really drawn by worker and not taken from render cache
+# input: (http_client or asgi_client, name of satellite, number of call)
+# output: status code, 500 when job did not end with all maps drawn
+def draw_map(client, sat, number):
+    form = {"sat": sat,
+            "form_satellite_resolution": 1,
+            "form_sun_resolution": 1,
+            "form_path_resolution": 100 + number,
+            "form_before_time": 3600,
+            "form_after_time": 3600,
+            "form_satellite_area": "on",
+            "form_sun_area": "on",
+            }
+    status, body = client.fetch(DRAW_REQUEST, form)
+    if status >= 400:
+        return status
+    job_id = json.loads(body)["job"]
+    while True:
+        status, body = client.fetch(f'/job/{job_id}')
+        if status >= 400:
+            return status
+        job = json.loads(body)
+        if job["finished"] is not None:
+            return 200 if job["status"] == "done" else 500
+        time.sleep(0.1)
+
+
+# returns latency statistics
+# input: [*[seconds, status]]
+# output: {'count','errors','p50','p95','max'} with times in milliseconds
+def summary(results):
+    times = sorted(item[0] * 1000 for item in results)
+    if not times:
+        return {"count": 0, "errors": 0}
+    return {"count": len(times),
+            "errors": sum(1 for item in results if item[1] >= 400),
+            "p50": round(times[len(times) // 2], 1),
+            "p95": round(times[min(len(times) - 1, int(len(times) * 0.95))], 1),
+            "max": round(times[-1], 1),
+            }
+
+
+# sends heavy requests from many clients at once and meanwhile measures light requests
+# input: (http_client or asgi_client, number of concurrent heavy clients, heavy requests per client,
+#         name of satellite for map requests)
+# output: {'idle','heavy','light','seconds'}
+def load_test(client, concurrency, repeat, sat):
+    draws = itertools.count()
+
+    def timed(path):
+        started = time.time()
+        if path == DRAW_REQUEST:
+            status = draw_map(client, sat, next(draws))
+        else:
+            status = client.fetch(path)[0]
+        return [time.time() - started, status]
+
+    def probe(count, pause):
+        results = []
+        for x in range(count):
+            results.append(timed(LIGHT_REQUESTS[x % len(LIGHT_REQUESTS)]))
+            time.sleep(pause)
+        return results
+
+    # everything is requested once so caches and templates are warm before measuring
+    for path in HEAVY_REQUESTS + LIGHT_REQUESTS:
+        timed(path.format(sat=urllib.parse.quote(sat)))
+    idle = probe(20, 0.01)
+
+    heavy_paths = [HEAVY_REQUESTS[x % len(HEAVY_REQUESTS)].format(sat=urllib.parse.quote(sat))
+                   for x in range(concurrency * repeat)]
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(timed, path) for path in heavy_paths]
+        light = []
+        while not all(future.done() for future in futures):
+            light += probe(1, 0.05)
+        heavy = [future.result() for future in futures]
+    return {"idle": summary(idle),
+            "heavy": summary(heavy),
+            "light": summary(light),
+            "seconds": round(time.time() - started, 2),
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='measures latency of light pages while heavy requests run')
+    parser.add_argument('--url', help='address of running server, asgi.py is loaded in this process when not given')
+    parser.add_argument('--concurrency', type=int, default=8, help='number of clients sending heavy requests')
+    parser.add_argument('--repeat', type=int, default=4, help='heavy requests sent by every client')
+    parser.add_argument('--sat', default=None, help='name of satellite for map requests (first of tle config)')
+    arguments = parser.parse_args()
+
+    sat = arguments.sat
+    if sat is None:
+        sys.path.insert(0, ROOT_DIR)
+        from scripts.satellite import registry
+        sat = registry.get_satellites()[0].satellite_object.name
+    client = http_client(arguments.url) if arguments.url else asgi_client()
+    result = load_test(client, arguments.concurrency, arguments.repeat, sat)
+    pprint(result)
+    print(json.dumps(result))
@@ -0,0 +1,55 @@
+from pathlib import Path
+from pprint import pprint
+
+CONFIG_PATH = str(Path(__file__).parent.parent.parent.as_posix()) + "/config/server.cfg"
+
+# values used when option is missing in config
+DEFAULTS = {
+    "render_workers": 0,
+    "ephemeris_hours": 24,
+    "ephemeris_step": 60,
+    "interpolation_tolerance": 0.01,
+    "interpolation_step": 60,
+    "interpolation_hours": 2,
+    "pass_workers": 0,
+    "pass_deadline": 10,
+    "render_images": 1,
+    "render_bucket": 10,
+    "render_cache_entries": 64,
+    "image_format": "png",
+    "image_dpi": 100,
+    "png_compression": 6,
+    "webp_quality": 80,
+    "live_interval": 1,
+    "light_workers": 4,
+    "heavy_workers": 0,
+    "stream_workers": 32,
+}
+
+
+# returns options from server config as dict, numbers are converted to int or float
+def read_config(path=CONFIG_PATH):
+    config = dict(DEFAULTS)
+    file = open(path, "r")
+    lines = file.readlines()
+    file.close()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        key, value = [item.strip() for item in line.split('=', 1)]
+        config[key] = convert(value)
+    return config
+
+
+def convert(value):
+    for kind in (int, float):
+        try:
+            return kind(value)
+        except ValueError:
+            pass
+    return value
+
+
+if __name__ == "__main__":
+    pprint(read_config())
\ No newline at end of file
@@ -1,13 +1,30 @@
 from pathlib import Path
 from pprint import pprint
 
-def read_current_pos():
-    path = str(Path(__file__).parent.parent.parent.as_posix()) + "/config/current_position.cfg"
+POSITION_PATH = str(Path(__file__).parent.parent.parent.as_posix()) + "/config/current_position.cfg"
+
+
+# returns position of first station in config
+def read_current_pos(path=POSITION_PATH):
+    return read_stations(path)[0][1]
+
+
+# returns every ground station from config, one station per line as "longitude, latitude[, name]"
+# output: [*[name, [longitude, latitude]]]
+def read_stations(path=POSITION_PATH):
     file = open(path, "r")
     lines = file.readlines()
-    current_position_str = str(lines[0]).split(',')
-    return [float(current_position_str[0]), float(current_position_str[1])]
+    file.close()
+    stations = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        current_position_str = line.split(',', 2)
+        name = current_position_str[2].strip() if len(current_position_str) > 2 else f'station {len(stations) + 1}'
+        stations.append([name, [float(current_position_str[0]), float(current_position_str[1])]])
+    return stations
 
 
 if __name__ == "__main__":
-    print(read_current_pos())
\ No newline at end of file
+    print(read_stations())
\ No newline at end of file
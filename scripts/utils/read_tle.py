@@ -1,26 +1,69 @@
 from pathlib import Path
 from pprint import pprint
 
-def read_tle():
-    path = str(Path(__file__).parent.parent.parent.as_posix()) + "/config/tle.cfg"
-    file = open(path, "r")
-    lines = file.readlines()
-    satellites = []
-    sat = []
-    current_line = 0
-    for line in lines:
-        sat.append(line)
-        if current_line == 2:
-            if int(line[0]) != 2:
-                raise Exception(f'error when laoding tle file at location: "{path}"')
-            current_line = 0
-            satellites.append(''.join(sat))
-            sat = []
-        else:
-            current_line += 1
+TLE_PATH = str(Path(__file__).parent.parent.parent.as_posix()) + "/config/tle.cfg"
+
+
+def read_tle(path=TLE_PATH):
+    with open(path, "r") as file:
+        satellites = [tle for group, tle in iter_tle(file, path)]
     print(f'loaded {len(satellites)} files from tle config')
     return satellites
 
 
+# returns checksum of tle line, last digit of sum of all digits where minus sign counts as 1
+# input: tle line
+# output: int
+def checksum(line):
+    return sum(int(char) if char.isdigit() else char == '-' for char in line[:68]) % 10
+
+
+# returns True when line is tle line with given number and correct checksum
+# input: (tle line, 1 or 2)
+# output: bool
+def valid_line(line, number):
+    return len(line) >= 69 and line[0] == str(number) and line[68].isdigit() and checksum(line) == int(line[68])
+
+
+# reads tle entries one by one, so even full celestrak dump is never held in memory as whole
+# both 3 line entries (with name, also "0 name" style) and 2 line entries (named by norad id) are accepted
+# line starting with "#" sets group of all entries below it
+# entries with broken lines or wrong checksum are skipped
+# input: (iterable of lines like opened file, path shown in messages)
+# output: generator of (group or None, 3 line tle string)
+def iter_tle(lines, path=TLE_PATH):
+    group = None
+    name = None
+    line1 = None
+    skipped = 0
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        if line1 is not None:
+            if valid_line(line, 2) and line[2:7] == line1[2:7]:
+                yield group, f'{name or line1[2:7].strip()}\n{line1}\n{line}'
+                name = None
+                line1 = None
+                continue
+            skipped += 1
+            name = None
+            line1 = None
+        if line.startswith('#'):
+            group = line[1:].strip() or None
+        elif valid_line(line, 1):
+            line1 = line
+        elif len(line) >= 69 and line[:2] in ('1 ', '2 '):
+            skipped += line[0] == '1'  # second line of broken entry is not counted again
+            name = None
+        else:
+            name = line[2:] if line.startswith('0 ') else line
+            name = name.strip()
+    if line1 is not None:
+        skipped += 1
+    if skipped:
+        print(f'skipped {skipped} broken entries in tle file at location: "{path}"')
+
+
 if __name__ == "__main__":
     print(read_tle())
\ No newline at end of file
@@ -1,20 +1,11 @@
-from flask import Flask, redirect, url_for, render_template, request, send_from_directory, jsonify
+from app import app
 import scripts.satellite.satellite
-import sys
-import os
-
-app = Flask(__name__)
 
+# server.py only starts app, it is imported again by render worker processes so it must not define anything
+from scripts.pages.index import index
 from scripts.pages.ssm import satellite_static_map
 from scripts.pages.sfr import satellite_flyby_radar
-
-@app.route('/favicon.ico')
-def favicon():
-    return send_from_directory(os.path.join(app.root_path, 'static'),'images/favicon.ico', mimetype='image/vnd.microsoft.icon')
-
-@app.route("/")
-def index():
-    return render_template("index.html")
+from scripts.pages.api import api_map
 
 
 if __name__ == "__main__":